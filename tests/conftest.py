@@ -0,0 +1,74 @@
+"""
+Общие фикстуры для тестов ML Service.
+"""
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def service_available(request):
+    """Пропускает интеграционные тесты, если ML Service не запущен.
+
+    Общая HTTP-сессия проверки доступности закрывается в конце сессии тестирования.
+    """
+    from service_helpers import check_service_availability, close_session
+
+    request.addfinalizer(close_session)
+    if not check_service_availability():
+        pytest.skip("ML Service недоступен. Запустите систему с помощью docker-compose.")
+
+
+@pytest.fixture(scope="session")
+def http(service_available):
+    """Общая HTTP-сессия интеграционных тестов.
+
+    Соединения с ML Service переиспользуются (keep-alive) вместо установки
+    нового TCP-соединения на каждый запрос.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+        session.mount("http://", adapter)
+        yield session
+
+
+@pytest.fixture(scope="session")
+def tester(service_available):
+    """Фикстура, создающая тестировщика с авторизованным пользователем.
+
+    Авторизация выполняется один раз на всю сессию тестирования.
+    """
+    from service_helpers import TransactionTester
+
+    tester = TransactionTester()
+    assert tester.setup_test_user(), "Ошибка настройки тестового пользователя"
+    yield tester
+    tester.session.close()
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    """Фикстура, задающая общий цикл событий asyncio на всю сессию тестирования."""
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def app():
+    """Фикстура, импортирующая приложение FastAPI один раз на сессию тестирования."""
+    main = pytest.importorskip("app.main", reason="Реальные модули недоступны")
+    return main.app
+
+
+@pytest.fixture(scope="session")
+async def base_client(app):
+    """Фикстура, создающая общий асинхронный клиент приложения на всю сессию.
+
+    Запросы передаются приложению напрямую через ASGITransport,
+    без отдельного потока-портала на каждый запрос, как у TestClient.
+    """
+    import httpx
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
@@ -0,0 +1,13 @@
+"""
+Вспомогательные функции юнит-тестов ML Service.
+"""
+
+
+def set_first(db, value):
+    """Задает результат query(...).filter(...).first() для мока сессии БД."""
+    db.query.return_value.filter.return_value.first.return_value = value
+
+
+def set_ordered_all(db, value):
+    """Задает результат query(...).filter(...).order_by(...).all() для мока сессии БД."""
+    db.query.return_value.filter.return_value.order_by.return_value.all.return_value = value
@@ -2,7 +2,7 @@
 """
 Скрипт для запуска всех тестов ML Service.
 
-Запускает все типы тестов и выводит общий результат:
+Запускает все типы тестов в одном процессе через pytest и выводит общий результат:
 1. Тесты работоспособности системы
 2. Тесты транзакций
 3. Тесты пользовательских операций
@@ -11,10 +11,13 @@
 import os
 import sys
 import time
-import subprocess
-from typing import Dict, List, Tuple
+import importlib.util
+from typing import List
+
+from service_helpers import check_service_availability
 
 # Общие настройки
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
 TESTS = [
     {"file": "test_system.py", "name": "Общие тесты системы"},
     {"file": "test_transactions.py", "name": "Тесты транзакций"},
@@ -22,29 +25,6 @@ TESTS = [
 ]
 
 
-def check_service_availability() -> bool:
-    """Проверяет доступность сервиса перед запуском тестов."""
-    import requests
-    try:
-        # Проверяем доступность сервиса
-        response = requests.get("http://localhost:8000/health", timeout=5)
-        if response.status_code == 200:
-            print("Сервис доступен по эндпоинту: /health")
-            status = response.json().get("status")
-            return status == "healthy" or status == "ok"
-            
-        # Если health check не работает, проверяем доступность API через docs
-        response = requests.get("http://localhost:8000/docs", timeout=5)
-        if response.status_code == 200:
-            print("API доступно, но эндпоинт проверки здоровья не найден.")
-            return True
-            
-        return False
-    except Exception as e:
-        print(f"Ошибка при проверке доступности: {e}")
-        return False
-
-
 def wait_for_service(max_attempts: int = 10, delay: int = 5) -> bool:
     """Ожидает готовности сервиса с повторными попытками."""
     print("Проверка доступности ML Service...")
@@ -61,32 +41,46 @@ def wait_for_service(max_attempts: int = 10, delay: int = 5) -> bool:
     return False
 
 
-def run_test(test_file: str) -> Tuple[bool, str]:
-    """Запускает отдельный тестовый скрипт и возвращает результат."""
-    try:
-        print(f"\n\n{'=' * 60}")
-        print(f"Запуск {test_file}")
-        print(f"{'=' * 60}\n")
-        
-        # Запускаем тест с перенаправлением вывода в консоль (не захватываем stderr)
-        result = subprocess.run([sys.executable, test_file], text=True)
-        
-        # Запускаем тест еще раз для определения статуса, захватывая вывод
-        result_capture = subprocess.run([sys.executable, test_file], capture_output=True, text=True)
-        output = result_capture.stdout + result_capture.stderr
-        
-        # Определяем статус по возвращаемому коду и анализу вывода
-        if result.returncode == 0:
-            lines = output.strip().split('\n')
-            # Ищем строки успеха в выводе
-            success = any(("[OK]" in line and "успешно" in line) or 
-                         ("Успешно пройдено" in line and "из" in line and "100.0%" in line)
-                         for line in lines[-10:])
-            return success, output
-        else:
-            return False, output
-    except Exception as e:
-        return False, f"Ошибка при запуске теста {test_file}: {str(e)}"
+def _report_file(report) -> str:
+    """Возвращает имя тестового файла, к которому относится отчет pytest."""
+    return os.path.basename(report.nodeid.split("::")[0])
+
+
+class ResultCollector:
+    """Плагин pytest, собирающий итоги выполнения по каждому тестовому файлу."""
+
+    def __init__(self):
+        self.failed = set()
+        self.passed = set()
+
+    def pytest_collectreport(self, report):
+        # Ошибка импорта файла не порождает отчетов о выполнении тестов
+        if report.failed:
+            self.failed.add(_report_file(report))
+
+    def pytest_runtest_logreport(self, report):
+        if report.failed:
+            self.failed.add(_report_file(report))
+        elif report.when == "call" and report.passed:
+            self.passed.add(_report_file(report))
+
+    def status(self, test_file: str) -> str:
+        """Возвращает итог файла: OK, FAIL или SKIP, если ни один тест не прошел."""
+        if test_file in self.failed:
+            return "FAIL"
+        if test_file in self.passed:
+            return "OK"
+        return "SKIP"
+
+
+def build_pytest_args() -> List[str]:
+    """Формирует аргументы запуска pytest для всех тестовых файлов."""
+    args = [os.path.join(TESTS_DIR, test["file"]) for test in TESTS] + ["-q"]
+    if importlib.util.find_spec("xdist") is not None:
+        # Файлы выполняются параллельно, но тесты одного файла зависят
+        # друг от друга, поэтому каждый файл целиком остается на одном воркере
+        args = ["-n", "auto", "--dist", "loadfile"] + args
+    return args
 
 
 def main():
@@ -99,25 +93,16 @@ def main():
     if not wait_for_service():
         sys.exit(1)
     
-    results = {}
-    outputs = {}
+    # Запускаем все тесты в текущем интерпретаторе
+    import pytest
+    collector = ResultCollector()
+    exit_code = pytest.main(build_pytest_args(), plugins=[collector])
     
-    # Запускаем каждый тест
-    for test in TESTS:
-        test_file = test["file"]
-        test_name = test["name"]
-        
-        success, output = run_test(test_file)
-        results[test_file] = success
-        outputs[test_file] = output
-        
-        # Печатаем результат теста
-        status = "УСПЕШНО" if success else "ОШИБКА"
-        print(f"\n> {test_name}: {status}")
+    results = {test["file"]: collector.status(test["file"]) for test in TESTS}
     
-    # Общий результат всех тестов
+    # Общий результат всех тестов: файл без пройденных тестов не считается успешным
     total_tests = len(TESTS)
-    successful_tests = sum(1 for result in results.values() if result)
+    successful_tests = sum(1 for result in results.values() if result == "OK")
     success_rate = (successful_tests / total_tests) * 100 if total_tests > 0 else 0
     
     print("\n" + "=" * 80)
@@ -128,35 +113,20 @@ def main():
     for i, test in enumerate(TESTS):
         test_file = test["file"]
         test_name = test["name"]
-        status = "[OK]" if results[test_file] else "[FAIL]"
+        status = f"[{results[test_file]}]"
         print(f"{i+1}. {test_name}: {status}")
     
     print("-" * 80)
     print(f"Успешно пройдено {successful_tests} из {total_tests} тестов ({success_rate:.1f}%)")
     
     # Общий результат
-    if successful_tests == total_tests:
+    if exit_code == 0 and successful_tests == total_tests:
         print("\n[OK] ВСЕ ТЕСТЫ УСПЕШНО ПРОЙДЕНЫ! СИСТЕМА РАБОТАЕТ КОРРЕКТНО.")
     else:
         print("\n[FAIL] НЕКОТОРЫЕ ТЕСТЫ НЕ ПРОЙДЕНЫ. СИСТЕМА МОЖЕТ РАБОТАТЬ НЕКОРРЕКТНО.")
-        
-        # Выводим детали проваленных тестов
-        print("\nДетали проваленных тестов:")
-        for test in TESTS:
-            test_file = test["file"]
-            if not results[test_file]:
-                print(f"\n--- {test['name']} ({test_file}) ---")
-                # Находим строки с ошибками
-                lines = outputs[test_file].split('\n')
-                error_lines = [line for line in lines if "ОШИБКА" in line or "ошибка" in line or "Error" in line or "error" in line]
-                if error_lines:
-                    for line in error_lines[-10:]:  # Показываем только последние 10 ошибок
-                        print(line)
-                else:
-                    print("Причина ошибки не найдена в выводе")
     
     # Возвращаем статус для использования в CI/CD
-    return 0 if successful_tests == total_tests else 1
+    return int(exit_code) or int(successful_tests != total_tests)
 
 
 if __name__ == "__main__":
@@ -2,107 +2,274 @@
 Юнит-тесты для API эндпоинтов ML Service.
 
 Эти тесты проверяют работу API эндпоинтов в изоляции,
-используя FastAPI TestClient и моки для внешних зависимостей.
+используя httpx.AsyncClient поверх ASGI-приложения и моки для внешних зависимостей.
 """
 
 import pytest
-from unittest.mock import patch, MagicMock, AsyncMock
-from fastapi import FastAPI
-from fastapi.testclient import TestClient
+from dataclasses import dataclass, field, replace
+from unittest.mock import MagicMock
 from datetime import datetime
+from typing import Optional
 import json
-import uuid
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
+from urllib.parse import urlencode
 
+# Пропускаем весь модуль, если модули приложения недоступны или не содержат нужных имен
 try:
-    from app.main import app
     from app.api.deps import get_db, get_current_user
-    from app.schemas.user import UserCreate, UserResponse
-    from app.schemas.token import Token
-    from app.schemas.transaction import TransactionCreate, TransactionResponse
-    from app.schemas.prediction import PredictionCreate, PredictionResponse
-    from app.models.user import User
-    from app.models.transaction import Transaction
-    from app.models.prediction import Prediction
-    
-    # Флаг для определения доступности реальных модулей
-    REAL_MODULES_AVAILABLE = True
+    from app.services import user_service, transaction_service, prediction_service
+    from app.api.endpoints import users as users_endpoints
+    from app.api.endpoints import predictions as predictions_endpoints
 except ImportError:
-    REAL_MODULES_AVAILABLE = False
-    print("Внимание: Реальные модули недоступны. Используются заглушки для тестов.")
-    app = FastAPI()
+    pytest.skip("Реальные модули недоступны", allow_module_level=True)
+
+
+# Асинхронные тесты выполняет плагин anyio
+pytestmark = [pytest.mark.anyio, pytest.mark.unit]
+
+
+# Фиксированный момент времени для всех моков
+_NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+# Маркер отсутствующего переопределения зависимости
+_MISSING = object()
+
+# Тестовый токен и заголовок авторизации с ним
+_TEST_TOKEN = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJzdWIiOiJ0ZXN0dXNlciIsImV4cCI6MTcwMDAwMDAwMH0.test"
+_AUTH_HEADERS = {"Authorization": f"Bearer {_TEST_TOKEN}"}
+
+# Тела POST-запросов кодируются один раз при импорте модуля
+_JSON_HEADERS = {"content-type": "application/json"}
+_FORM_HEADERS = {"content-type": "application/x-www-form-urlencoded"}
+
+_USER_DATA_BYTES = json.dumps({
+    "username": "newuser",
+    "email": "new@example.com",
+    "password": "password123"
+}).encode()
+
+_LOGIN_FORM_BYTES = urlencode({
+    "username": "testuser",
+    "password": "password123"
+}).encode()
+
+_INVALID_LOGIN_FORM_BYTES = urlencode({
+    "username": "testuser",
+    "password": "wrongpassword"
+}).encode()
+
+_TOPUP_BYTES = json.dumps({
+    "amount": 50.0,
+    "description": "Тестовое пополнение"
+}).encode()
+
+_PREDICTION_DATA = {
+    "data": {"text": "Тестовый текст"},
+    "model_version": "v1.0"
+}
+_PREDICTION_BYTES = json.dumps(_PREDICTION_DATA).encode()
+
+# Обязательные ключи элементов истории транзакций и предсказаний
+_EXPECTED_TX_KEYS = frozenset({"id", "user_id", "type", "amount", "description", "created_at"})
+_EXPECTED_PRED_KEYS = frozenset({"id", "user_id", "status", "data", "result", "model_version", "created_at"})
+
+
+# Заглушки для тестов
+@dataclass(frozen=True)
+class _UserDouble:
+    """Неизменяемый дублер модели пользователя с атрибутами, которые читают эндпоинты."""
+    id: int = 1
+    username: str = "testuser"
+    email: str = "test@example.com"
+    hashed_password: str = "hashedpassword123"
+    balance: float = 100.0
+    created_at: datetime = _NOW
+
+
+@dataclass(frozen=True)
+class _TransactionDouble:
+    """Неизменяемый дублер модели транзакции."""
+    id: str = "tx_123"
+    user_id: int = 1
+    type: str = "topup"
+    amount: float = 50.0
+    description: str = "Тестовое пополнение"
+    created_at: datetime = _NOW
+
+
+@dataclass(frozen=True)
+class _PredictionDouble:
+    """Неизменяемый дублер модели предсказания (по умолчанию завершенного)."""
+    id: str = "pred_123"
+    user_id: int = 1
+    status: str = "completed"
+    data: dict = field(default_factory=lambda: {"text": "Тестовый текст"})
+    result: Optional[dict] = field(default_factory=lambda: {"prediction": "positive", "confidence": 0.95})
+    model_version: str = "v1.0"
+    created_at: datetime = _NOW
+    updated_at: datetime = _NOW
+
+
+class _StubChain:
+    """Заглушка цепочки запроса query(...).filter(...).first()."""
+    
+    def __init__(self, first_result=None):
+        self._first_result = first_result
+    
+    def filter(self, *args, **kwargs):
+        return self
+    
+    def first(self):
+        return self._first_result
 
 
-# Пропускаем тесты, если модули недоступны
-pytestmark = pytest.mark.skipif(not REAL_MODULES_AVAILABLE, reason="Реальные модули недоступны")
+class _StubDB:
+    """Легковесная заглушка сессии БД без интроспекции класса Session.
+    
+    Результат query(...).filter(...).first() задается атрибутом first_result.
+    """
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        """Возвращает заглушку в исходное состояние."""
+        self.first_result = None
+    
+    def query(self, *args, **kwargs):
+        return _StubChain(self.first_result)
+
+
+class _AuthClient:
+    """Обертка над общим тестовым клиентом, передающая заголовок авторизации в каждом запросе.
+    
+    Заголовки самого клиента не изменяются, поэтому между тестами ничего не утекает.
+    """
+    
+    def __init__(self, client, headers):
+        self._client = client
+        self._headers = headers
+    
+    def _request(self, method, url, **kwargs):
+        headers = kwargs.get("headers")
+        kwargs["headers"] = {**self._headers, **headers} if headers else self._headers
+        return self._client.request(method, url, **kwargs)
+    
+    def get(self, url, **kwargs):
+        return self._request("GET", url, **kwargs)
+    
+    def post(self, url, **kwargs):
+        return self._request("POST", url, **kwargs)
 
 
 # Фикстуры для тестов
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_db():
-    """Фикстура, создающая мок сессии БД."""
-    db = MagicMock(spec=Session)
-    return db
+    """Фикстура, создающая заглушку сессии БД (один раз на сессию тестирования)."""
+    return _StubDB()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_user():
-    """Фикстура, создающая мок пользователя."""
-    user = MagicMock(spec=User)
-    user.id = 1
-    user.username = "testuser"
-    user.email = "test@example.com"
-    user.hashed_password = "hashedpassword123"
-    user.balance = 100.0
-    user.created_at = datetime.now()
-    return user
+    """Фикстура, создающая дублер пользователя (один раз на сессию тестирования)."""
+    return _UserDouble()
 
 
 @pytest.fixture
 def test_token():
-    """Фикстура, создающая тестовый токен."""
-    return "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJzdWIiOiJ0ZXN0dXNlciIsImV4cCI6MTcwMDAwMDAwMH0.test"
+    """Фикстура, возвращающая тестовый токен."""
+    return _TEST_TOKEN
 
 
-@pytest.fixture
-def client(test_db, test_user):
-    """Фикстура, создающая тестовый клиент FastAPI."""
-    # Переопределяем зависимости для тестов
+@pytest.fixture(scope="session")
+def _client_singleton(app, base_client, test_db, test_user):
+    """Фикстура, переопределяющая зависимости общего клиента один раз на сессию."""
+    # Переопределяем зависимости для тестов. Корутины без yield FastAPI просто
+    # ожидает, а обычные функции запускал бы в пуле потоков на каждый запрос
     async def override_get_db():
-        try:
-            yield test_db
-        finally:
-            pass
+        return test_db
     
     async def override_get_current_user():
         return test_user
     
-    app.dependency_overrides[get_db] = override_get_db
-    app.dependency_overrides[get_current_user] = override_get_current_user
+    overrides = {
+        get_db: override_get_db,
+        get_current_user: override_get_current_user,
+    }
+    # Запоминаем ранее установленные переопределения, чтобы не затереть их
+    previous = {dependency: app.dependency_overrides.get(dependency, _MISSING) for dependency in overrides}
+    app.dependency_overrides.update(overrides)
     
-    client = TestClient(app)
-    yield client
+    yield base_client
     
-    # Очистка переопределенных зависимостей
-    app.dependency_overrides = {}
+    # Восстанавливаем переопределения зависимостей в конце сессии
+    for dependency, override in previous.items():
+        if override is _MISSING:
+            app.dependency_overrides.pop(dependency, None)
+        else:
+            app.dependency_overrides[dependency] = override
+
+
+@pytest.fixture(scope="class", autouse=True)
+def _patched_services():
+    """Фикстура, подменяющая сервисные функции моками один раз на класс тестов."""
+    # Патчим сами объекты модулей, чтобы не разбирать строковые пути импорта
+    patched_functions = {
+        user_service: ('create_user',),
+        transaction_service: ('get_balance', 'top_up_balance', 'get_user_transactions'),
+        prediction_service: ('create_prediction', 'get_prediction', 'get_user_predictions'),
+        users_endpoints: ('authenticate_user', 'create_access_token'),
+        predictions_endpoints: ('process_prediction_task',),
+    }
+    with pytest.MonkeyPatch.context() as mp:
+        mocks = []
+        for target, names in patched_functions.items():
+            for name in names:
+                mock = MagicMock()
+                mp.setattr(target, name, mock)
+                mocks.append(mock)
+        yield mocks
+
+
+@pytest.fixture(autouse=True)
+def _reset_mocks(test_db, _patched_services):
+    """Сбрасывает состояние общих моков перед каждым тестом."""
+    test_db.reset()
+    for mock in _patched_services:
+        mock.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture
+def client(_client_singleton):
+    """Фикстура, возвращающая общий тестовый клиент."""
+    return _client_singleton
 
 
 @pytest.fixture
-def authenticated_client(client, test_token):
+def authenticated_client(client):
     """Фикстура, создающая аутентифицированный тестовый клиент."""
-    client.headers = {"Authorization": f"Bearer {test_token}"}
-    return client
+    return _AuthClient(client, _AUTH_HEADERS)
+
+
+@pytest.fixture(scope="session")
+def mock_transaction(test_user):
+    """Фикстура, создающая дублер транзакции (один раз на сессию тестирования)."""
+    return _TransactionDouble(user_id=test_user.id)
+
+
+@pytest.fixture(scope="session")
+def mock_prediction(test_user):
+    """Фикстура, создающая дублер завершенного предсказания (один раз на сессию тестирования)."""
+    return _PredictionDouble(user_id=test_user.id)
 
 
 # Тесты для системных эндпоинтов
 class TestSystemEndpoints:
     """Тесты для системных эндпоинтов API."""
     
-    def test_health_endpoint(self, client):
+    async def test_health_endpoint(self, client):
         """Тест эндпоинта проверки здоровья системы."""
         # Вызов тестируемого эндпоинта
-        response = client.get("/health")
+        response = await client.get("/health")
         
         # Проверки
         assert response.status_code == 200
@@ -113,267 +280,202 @@ class TestSystemEndpoints:
 class TestUserEndpoints:
     """Тесты для эндпоинтов пользователей API."""
     
-    def test_create_user_success(self, client, test_db, test_user):
-        """Тест успешного создания пользователя."""
-        # Настройка входных данных
-        user_data = {
-            "username": "newuser",
-            "email": "new@example.com",
-            "password": "password123"
-        }
+    @pytest.mark.parametrize(
+        "side_effect,expected_status,expected_detail",
+        [
+            (None, 201, None),
+            (ValueError("Username already registered"), 400, "Username already registered"),
+        ],
+        ids=["success", "duplicate_username"],
+    )
+    async def test_create_user(self, client, test_db, test_user, side_effect, expected_status, expected_detail):
+        """Тест создания пользователя: успешного и с уже существующим именем."""
+        # Настройка моков
+        test_db.first_result = None
+        user_service.create_user.return_value = test_user
+        user_service.create_user.side_effect = side_effect
         
-        # Настройка мока
-        test_db.query.return_value.filter.return_value.first.return_value = None
-        
-        # Настройка патчей
-        with patch('app.services.user_service.create_user', return_value=test_user):
-            # Вызов тестируемого эндпоинта
-            response = client.post("/users/", json=user_data)
-            
-            # Проверки
-            assert response.status_code == 201
-            assert "id" in response.json()
-            assert "username" in response.json()
-            assert "email" in response.json()
-            assert "password" not in response.json()
-    
-    def test_create_user_duplicate_username(self, client, test_db, test_user):
-        """Тест создания пользователя с уже существующим именем."""
-        # Настройка входных данных
-        user_data = {
-            "username": "testuser",
-            "email": "new@example.com",
-            "password": "password123"
-        }
+        # Вызов тестируемого эндпоинта
+        response = await client.post("/users/", content=_USER_DATA_BYTES, headers=_JSON_HEADERS)
         
-        # Настройка патчей
-        with patch('app.services.user_service.create_user', side_effect=ValueError("Username already registered")):
-            # Вызов тестируемого эндпоинта
-            response = client.post("/users/", json=user_data)
-            
-            # Проверки
-            assert response.status_code == 400
-            assert "detail" in response.json()
-            assert "Username already registered" in response.json()["detail"]
+        # Проверки
+        assert response.status_code == expected_status
+        body = response.json()
+        if expected_detail is None:
+            assert "id" in body
+            assert "username" in body
+            assert "email" in body
+            assert "password" not in body
+        else:
+            assert "detail" in body
+            assert expected_detail in body["detail"]
     
-    def test_login_success(self, client, test_db, test_user, test_token):
+    async def test_login_success(self, client, test_db, test_user, test_token):
         """Тест успешного входа в систему."""
-        # Настройка входных данных
-        login_data = {
-            "username": "testuser",
-            "password": "password123"
-        }
+        # Настройка моков
+        test_db.first_result = test_user
+        users_endpoints.authenticate_user.return_value = test_user
+        users_endpoints.create_access_token.return_value = test_token
         
-        # Настройка мока
-        test_db.query.return_value.filter.return_value.first.return_value = test_user
+        # Вызов тестируемого эндпоинта
+        response = await client.post("/users/login", content=_LOGIN_FORM_BYTES, headers=_FORM_HEADERS)
         
-        # Настройка патчей
-        with patch('app.api.endpoints.users.authenticate_user', return_value=test_user):
-            with patch('app.api.endpoints.users.create_access_token', return_value=test_token):
-                # Вызов тестируемого эндпоинта
-                response = client.post("/users/login", data=login_data)
-                
-                # Проверки
-                assert response.status_code == 200
-                assert response.json()["access_token"] == test_token
-                assert response.json()["token_type"] == "bearer"
+        # Проверки
+        assert response.status_code == 200
+        body = response.json()
+        assert body["access_token"] == test_token
+        assert body["token_type"] == "bearer"
     
-    def test_login_invalid_credentials(self, client, test_db):
+    async def test_login_invalid_credentials(self, client, test_db):
         """Тест входа в систему с неверными учетными данными."""
-        # Настройка входных данных
-        login_data = {
-            "username": "testuser",
-            "password": "wrongpassword"
-        }
+        # Настройка моков
+        users_endpoints.authenticate_user.return_value = None
+        
+        # Вызов тестируемого эндпоинта
+        response = await client.post("/users/login", content=_INVALID_LOGIN_FORM_BYTES, headers=_FORM_HEADERS)
         
-        # Настройка патчей
-        with patch('app.api.endpoints.users.authenticate_user', return_value=None):
-            # Вызов тестируемого эндпоинта
-            response = client.post("/users/login", data=login_data)
-            
-            # Проверки
-            assert response.status_code == 401
-            assert "detail" in response.json()
-            assert "Incorrect username or password" in response.json()["detail"]
+        # Проверки
+        assert response.status_code == 401
+        body = response.json()
+        assert "detail" in body
+        assert "Incorrect username or password" in body["detail"]
     
-    def test_get_current_user(self, authenticated_client, test_user):
+    async def test_get_current_user(self, authenticated_client, test_user):
         """Тест получения текущего пользователя."""
         # Вызов тестируемого эндпоинта
-        response = authenticated_client.get("/users/me")
+        response = await authenticated_client.get("/users/me")
         
         # Проверки
         assert response.status_code == 200
-        assert response.json()["username"] == test_user.username
-        assert response.json()["email"] == test_user.email
-        assert "password" not in response.json()
+        body = response.json()
+        assert body["username"] == test_user.username
+        assert body["email"] == test_user.email
+        assert "password" not in body
 
 
 # Тесты для эндпоинтов транзакций
 class TestTransactionEndpoints:
     """Тесты для эндпоинтов транзакций API."""
     
-    def test_get_balance_success(self, authenticated_client, test_db, test_user):
+    async def test_get_balance_success(self, authenticated_client, test_db, test_user):
         """Тест успешного получения баланса."""
-        # Настройка патчей
-        with patch('app.services.transaction_service.get_balance', return_value=test_user.balance):
-            # Вызов тестируемого эндпоинта
-            response = authenticated_client.get("/transactions/balance")
-            
-            # Проверки
-            assert response.status_code == 200
-            assert response.json()["balance"] == test_user.balance
+        # Настройка моков
+        transaction_service.get_balance.return_value = test_user.balance
+        
+        # Вызов тестируемого эндпоинта
+        response = await authenticated_client.get("/transactions/balance")
+        
+        # Проверки
+        assert response.status_code == 200
+        body = response.json()
+        assert body["balance"] == test_user.balance
     
-    def test_top_up_balance_success(self, authenticated_client, test_db, test_user):
+    async def test_top_up_balance_success(self, authenticated_client, test_db, test_user):
         """Тест успешного пополнения баланса."""
-        # Настройка входных данных
-        topup_data = {
-            "amount": 50.0,
-            "description": "Тестовое пополнение"
-        }
+        # Настройка моков
+        transaction_service.top_up_balance.return_value = (100.0, 150.0, "tx_123")
+        
+        # Вызов тестируемого эндпоинта
+        response = await authenticated_client.post("/transactions/topup", content=_TOPUP_BYTES, headers=_JSON_HEADERS)
         
-        # Настройка патчей
-        with patch('app.services.transaction_service.top_up_balance', return_value=(100.0, 150.0, "tx_123")):
-            # Вызов тестируемого эндпоинта
-            response = authenticated_client.post("/transactions/topup", json=topup_data)
-            
-            # Проверки
-            assert response.status_code == 200
-            assert response.json()["previous_balance"] == 100.0
-            assert response.json()["current_balance"] == 150.0
-            assert response.json()["transaction_id"] == "tx_123"
+        # Проверки
+        assert response.status_code == 200
+        body = response.json()
+        assert body["previous_balance"] == 100.0
+        assert body["current_balance"] == 150.0
+        assert body["transaction_id"] == "tx_123"
     
-    def test_get_transactions_success(self, authenticated_client, test_db, test_user):
+    async def test_get_transactions_success(self, authenticated_client, mock_transaction):
         """Тест успешного получения транзакций."""
         # Создаем список транзакций
-        mock_transaction = MagicMock(spec=Transaction)
-        mock_transaction.id = "tx_123"
-        mock_transaction.user_id = test_user.id
-        mock_transaction.type = "topup"
-        mock_transaction.amount = 50.0
-        mock_transaction.description = "Тестовое пополнение"
-        mock_transaction.created_at = datetime.now()
-        
         transactions = [mock_transaction] * 5
         
-        # Настройка патчей
-        with patch('app.services.transaction_service.get_user_transactions', return_value=transactions):
-            # Вызов тестируемого эндпоинта
-            response = authenticated_client.get("/transactions/history")
-            
-            # Проверки
-            assert response.status_code == 200
-            assert isinstance(response.json(), list)
-            assert len(response.json()) == 5
-            for tx in response.json():
-                assert "id" in tx
-                assert "user_id" in tx
-                assert "type" in tx
-                assert "amount" in tx
-                assert "description" in tx
-                assert "created_at" in tx
+        # Настройка моков
+        transaction_service.get_user_transactions.return_value = transactions
+        
+        # Вызов тестируемого эндпоинта
+        response = await authenticated_client.get("/transactions/history")
+        
+        # Проверки
+        assert response.status_code == 200
+        body = response.json()
+        assert isinstance(body, list)
+        assert len(body) == 5
+        for tx in body:
+            assert _EXPECTED_TX_KEYS <= tx.keys()
 
 
 # Тесты для эндпоинтов предсказаний
 class TestPredictionEndpoints:
     """Тесты для эндпоинтов предсказаний API."""
     
-    def test_create_prediction_success(self, authenticated_client, test_db, test_user):
+    async def test_create_prediction_success(self, authenticated_client, mock_prediction):
         """Тест успешного создания предсказания."""
-        # Настройка входных данных
-        prediction_data = {
-            "data": {"text": "Тестовый текст"},
-            "model_version": "v1.0"
-        }
+        # Копия общего дублера в состоянии только что созданного предсказания
+        pending_prediction = replace(
+            mock_prediction,
+            status="pending",
+            data=_PREDICTION_DATA["data"],
+            result=None,
+            model_version=_PREDICTION_DATA["model_version"],
+        )
         
-        # Создаем мок предсказания
-        mock_prediction = MagicMock(spec=Prediction)
-        mock_prediction.id = "pred_123"
-        mock_prediction.user_id = test_user.id
-        mock_prediction.status = "pending"
-        mock_prediction.data = prediction_data["data"]
-        mock_prediction.result = None
-        mock_prediction.model_version = prediction_data["model_version"]
-        mock_prediction.created_at = datetime.now()
-        mock_prediction.updated_at = datetime.now()
+        # Настройка моков
+        prediction_service.create_prediction.return_value = pending_prediction
+        predictions_endpoints.process_prediction_task.return_value = None
         
-        # Настройка патчей
-        with patch('app.services.prediction_service.create_prediction', return_value=mock_prediction):
-            with patch('app.api.endpoints.predictions.process_prediction_task', return_value=None):
-                # Вызов тестируемого эндпоинта
-                response = authenticated_client.post("/predictions/", json=prediction_data)
-                
-                # Проверки
-                assert response.status_code == 202
-                assert response.json()["id"] == mock_prediction.id
-                assert response.json()["status"] == "pending"
-                assert response.json()["data"] == prediction_data["data"]
-    
-    def test_get_prediction_success(self, authenticated_client, test_db, test_user):
-        """Тест успешного получения предсказания."""
-        # Создаем мок предсказания
-        mock_prediction = MagicMock(spec=Prediction)
-        mock_prediction.id = "pred_123"
-        mock_prediction.user_id = test_user.id
-        mock_prediction.status = "completed"
-        mock_prediction.data = {"text": "Тестовый текст"}
-        mock_prediction.result = {"prediction": "positive", "confidence": 0.95}
-        mock_prediction.model_version = "v1.0"
-        mock_prediction.created_at = datetime.now()
-        mock_prediction.updated_at = datetime.now()
+        # Вызов тестируемого эндпоинта
+        response = await authenticated_client.post("/predictions/", content=_PREDICTION_BYTES, headers=_JSON_HEADERS)
         
-        # Настройка патчей
-        with patch('app.services.prediction_service.get_prediction', return_value=mock_prediction):
-            # Вызов тестируемого эндпоинта
-            response = authenticated_client.get("/predictions/pred_123")
-            
-            # Проверки
-            assert response.status_code == 200
-            assert response.json()["id"] == mock_prediction.id
-            assert response.json()["status"] == "completed"
-            assert response.json()["data"] == mock_prediction.data
-            assert response.json()["result"] == mock_prediction.result
+        # Проверки
+        assert response.status_code == 202
+        body = response.json()
+        assert body["id"] == pending_prediction.id
+        assert body["status"] == "pending"
+        assert body["data"] == _PREDICTION_DATA["data"]
     
-    def test_get_prediction_not_found(self, authenticated_client, test_db):
-        """Тест получения несуществующего предсказания."""
-        # Настройка патчей
-        with patch('app.services.prediction_service.get_prediction', return_value=None):
-            # Вызов тестируемого эндпоинта
-            response = authenticated_client.get("/predictions/nonexistent")
-            
-            # Проверки
-            assert response.status_code == 404
-            assert "detail" in response.json()
-            assert "Prediction not found" in response.json()["detail"]
+    @pytest.mark.parametrize(
+        "found,expected_status,expected_detail",
+        [
+            (True, 200, None),
+            (False, 404, "Prediction not found"),
+        ],
+        ids=["success", "not_found"],
+    )
+    async def test_get_prediction(self, authenticated_client, mock_prediction, found, expected_status, expected_detail):
+        """Тест получения предсказания: существующего и несуществующего."""
+        # Настройка моков
+        prediction_service.get_prediction.return_value = mock_prediction if found else None
+        
+        # Вызов тестируемого эндпоинта
+        response = await authenticated_client.get("/predictions/pred_123" if found else "/predictions/nonexistent")
+        
+        # Проверки
+        assert response.status_code == expected_status
+        body = response.json()
+        if expected_detail is None:
+            assert body["id"] == mock_prediction.id
+            assert body["status"] == "completed"
+            assert body["data"] == mock_prediction.data
+            assert body["result"] == mock_prediction.result
+        else:
+            assert "detail" in body
+            assert expected_detail in body["detail"]
     
-    def test_get_predictions_success(self, authenticated_client, test_db, test_user):
+    async def test_get_predictions_success(self, authenticated_client, mock_prediction):
         """Тест успешного получения предсказаний пользователя."""
-        # Создаем мок предсказания
-        mock_prediction = MagicMock(spec=Prediction)
-        mock_prediction.id = "pred_123"
-        mock_prediction.user_id = test_user.id
-        mock_prediction.status = "completed"
-        mock_prediction.data = {"text": "Тестовый текст"}
-        mock_prediction.result = {"prediction": "positive", "confidence": 0.95}
-        mock_prediction.model_version = "v1.0"
-        mock_prediction.created_at = datetime.now()
-        mock_prediction.updated_at = datetime.now()
-        
         predictions = [mock_prediction] * 5
         
-        # Настройка патчей
-        with patch('app.services.prediction_service.get_user_predictions', return_value=predictions):
-            # Вызов тестируемого эндпоинта
-            response = authenticated_client.get("/predictions/history")
-            
-            # Проверки
-            assert response.status_code == 200
-            assert isinstance(response.json(), list)
-            assert len(response.json()) == 5
-            for pred in response.json():
-                assert "id" in pred
-                assert "user_id" in pred
-                assert "status" in pred
-                assert "data" in pred
-                assert "result" in pred
-                assert "model_version" in pred
-                assert "created_at" in pred 
\ No newline at end of file
+        # Настройка моков
+        prediction_service.get_user_predictions.return_value = predictions
+        
+        # Вызов тестируемого эндпоинта
+        response = await authenticated_client.get("/predictions/history")
+        
+        # Проверки
+        assert response.status_code == 200
+        body = response.json()
+        assert isinstance(body, list)
+        assert len(body) == 5
+        for pred in body:
+            assert _EXPECTED_PRED_KEYS <= pred.keys() 
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+Бенчмарки горячих участков тестового набора ML Service.
+
+Замеряются создание моков моделей, генерация имен пользователей и
+HTTP-запрос через общую сессию. Бенчмарки не выполняются при обычном
+запуске тестов, их запускают отдельно:
+
+    pytest test_bench.py --benchmark-only --benchmark-json=bench.json
+
+Для проверки на регрессию с сохраненным результатом:
+
+    pytest test_bench.py --benchmark-only --benchmark-autosave \
+        --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+
+import copy
+from unittest.mock import MagicMock
+
+import pytest
+
+# Пропускаем весь модуль, если плагин pytest-benchmark не установлен
+pytest.importorskip("pytest_benchmark", reason="pytest-benchmark не установлен")
+
+from service_helpers import UserTester, generate_random_username
+
+
+@pytest.fixture(autouse=True)
+def _benchmarks_enabled(request):
+    """Пропускает бенчмарки, если они не запрошены явно."""
+    config = request.config
+    if not (config.getoption("benchmark_enable") or config.getoption("benchmark_only")):
+        pytest.skip("Бенчмарки запускаются с --benchmark-enable или --benchmark-only")
+
+
+def test_bench_mock_create(benchmark):
+    """Тест скорости создания MagicMock."""
+    benchmark(MagicMock)
+
+
+def test_bench_mock_copy(benchmark):
+    """Тест скорости поверхностного копирования прототипа мока."""
+    proto = MagicMock()
+    proto.id = 1
+    proto.username = "testuser"
+    benchmark(copy.copy, proto)
+
+
+def test_bench_generate_random_username(benchmark):
+    """Тест скорости генерации имени пользователя."""
+    benchmark(generate_random_username)
+
+
+@pytest.mark.integration
+def test_bench_health_request(benchmark, http):
+    """Тест скорости запроса /health через общую HTTP-сессию."""
+    tester = UserTester(http)
+    response = benchmark(tester.make_request, "GET", "/health")
+    assert response.status_code == 200
@@ -5,48 +5,72 @@
 transaction_service и prediction_service в изоляции от внешних зависимостей.
 """
 
+import copy
 import pytest
-from unittest.mock import patch, MagicMock, AsyncMock
-from fastapi import HTTPException
-from datetime import datetime, timedelta
+from datetime import datetime
+from unittest.mock import MagicMock
 import uuid
-import json
-from decimal import Decimal
 
+from helpers import set_first, set_ordered_all
+
+# Пропускаем весь модуль, если модули приложения недоступны или не содержат нужных имен
 try:
     from app.services.user_service import UserService
     from app.services.transaction_service import TransactionService
     from app.services.prediction_service import PredictionService
-    from app.core.security import verify_password, get_password_hash
+    from app.schemas.user import UserCreate
+    from app.schemas.prediction import PredictionCreate
     from app.models.user import User
     from app.models.transaction import Transaction
     from app.models.prediction import Prediction
-    from app.schemas.user import UserCreate, UserResponse
-    from app.schemas.transaction import TransactionCreate, TransactionResponse
-    from app.schemas.prediction import PredictionCreate, PredictionResponse
-    
-    # Флаг для определения доступности реальных модулей
-    REAL_MODULES_AVAILABLE = True
 except ImportError:
-    REAL_MODULES_AVAILABLE = False
-    print("Внимание: Реальные модули недоступны. Используются заглушки для тестов.")
+    pytest.skip("Реальные модули недоступны", allow_module_level=True)
+
 
+# Маркеры для выборочного запуска: pytest -m unit или pytest -m services
+pytestmark = [pytest.mark.unit, pytest.mark.services]
 
-# Пропускаем тесты, если модули недоступны
-pytestmark = pytest.mark.skipif(not REAL_MODULES_AVAILABLE, reason="Реальные модули недоступны")
+
+# Входные данные сервисов создаются один раз при импорте модуля. Тесты не
+# проверяют валидацию схем, поэтому model_construct пропускает ее
+USER_CREATE = UserCreate.model_construct(
+    username="testuser",
+    email="test@example.com",
+    password="testpassword"
+)
+PREDICTION_CREATE = PredictionCreate.model_construct(
+    data={"text": "Тестовый текст"},
+    model_version="v1.0"
+)
+
+# Детерминированные UUID, которые выдает подмененный uuid.uuid4
+_UUIDS = tuple(uuid.UUID(int=i) for i in range(100))
 
 
 # Фикстуры для тестов
+@pytest.fixture(autouse=True)
+def deterministic_uuids(monkeypatch):
+    """Подменяет uuid.uuid4 генератором, выдающим UUID из _UUIDS по порядку."""
+    pool = iter(_UUIDS)
+    monkeypatch.setattr(uuid, "uuid4", lambda: next(pool))
+
+
 @pytest.fixture
 def mock_db():
-    """Фикстура, создающая мок сессии БД."""
+    """Фикстура, создающая мок сессии БД.
+    
+    Мок создается заново для каждого теста: его копия разделяла бы
+    дочерние моки и журнал вызовов с шаблоном.
+    """
     db = MagicMock()
     return db
 
 
-@pytest.fixture
-def mock_user():
-    """Фикстура, создающая мок пользователя."""
+# Шаблоны моков моделей. MagicMock(spec=...) строится один раз на модуль,
+# а тесты получают поверхностные копии шаблонов
+@pytest.fixture(scope="module")
+def _mock_user_template():
+    """Шаблон мока пользователя (создается один раз на модуль)."""
     user = MagicMock(spec=User)
     user.id = 1
     user.username = "testuser"
@@ -57,9 +81,9 @@ def mock_user():
     return user
 
 
-@pytest.fixture
-def mock_transaction():
-    """Фикстура, создающая мок транзакции."""
+@pytest.fixture(scope="module")
+def _mock_transaction_template():
+    """Шаблон мока транзакции (создается один раз на модуль)."""
     transaction = MagicMock(spec=Transaction)
     transaction.id = str(uuid.uuid4())
     transaction.user_id = 1
@@ -70,9 +94,9 @@ def mock_transaction():
     return transaction
 
 
-@pytest.fixture
-def mock_prediction():
-    """Фикстура, создающая мок предсказания."""
+@pytest.fixture(scope="module")
+def _mock_prediction_template():
+    """Шаблон мока предсказания (создается один раз на модуль)."""
     prediction = MagicMock(spec=Prediction)
     prediction.id = str(uuid.uuid4())
     prediction.user_id = 1
@@ -85,471 +109,385 @@ def mock_prediction():
     return prediction
 
 
+@pytest.fixture
+def mock_user(_mock_user_template):
+    """Фикстура, возвращающая копию мока пользователя с исходным балансом.
+
+    Сервисы изменяют баланс пользователя, поэтому каждый тест получает
+    собственную копию, а не общий шаблон.
+    """
+    user = copy.copy(_mock_user_template)
+    user.balance = 100.0
+    yield user
+
+
+@pytest.fixture
+def mock_transaction(_mock_transaction_template):
+    """Фикстура, возвращающая копию мока транзакции."""
+    return copy.copy(_mock_transaction_template)
+
+
+@pytest.fixture
+def mock_prediction(_mock_prediction_template):
+    """Фикстура, возвращающая копию мока предсказания."""
+    return copy.copy(_mock_prediction_template)
+
+
 # Тесты для UserService
-class TestUserService:
-    """Тесты для сервиса пользователей."""
-    
-    def test_create_user_success(self, mock_db):
-        """Тест успешного создания пользователя."""
-        # Настройка входных данных
-        user_data = UserCreate(
-            username="testuser",
-            email="test@example.com",
-            password="testpassword"
-        )
-        
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = None
-        
-        # Патч для хеширования пароля
-        with patch("app.services.user_service.get_password_hash", return_value="hashedpassword123"):
-            # Создаем сервис и вызываем метод
-            service = UserService(mock_db)
-            result = service.create_user(user_data)
+@pytest.mark.parametrize(
+    "user_exists,error",
+    [
+        (False, None),
+        (True, "Username already registered"),
+    ],
+    ids=["success", "duplicate_username"],
+)
+def test_create_user(mock_db, mock_user, monkeypatch, user_exists, error):
+    """Тест создания пользователя: успешного и с уже существующим именем."""
+    # Настройка моков
+    set_first(mock_db, mock_user if user_exists else None)
+    
+    # Патч для хеширования пароля
+    monkeypatch.setattr("app.services.user_service.get_password_hash", lambda password: "hashedpassword123")
+    
+    # Создаем сервис и вызываем метод
+    service = UserService(mock_db)
+    if error is None:
+        result = service.create_user(USER_CREATE)
         
         # Проверки
-        assert result.username == user_data.username
-        assert result.email == user_data.email
+        assert result.username == USER_CREATE.username
+        assert result.email == USER_CREATE.email
         assert "password" not in result.dict()
         mock_db.add.assert_called_once()
         mock_db.commit.assert_called_once()
         mock_db.refresh.assert_called_once()
-    
-    def test_create_user_duplicate(self, mock_db, mock_user):
-        """Тест создания пользователя с уже существующим именем."""
-        # Настройка входных данных
-        user_data = UserCreate(
-            username="testuser",
-            email="test@example.com",
-            password="testpassword"
-        )
-        
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        
-        # Создаем сервис и проверяем, что вызывается исключение
-        service = UserService(mock_db)
-        with pytest.raises(ValueError, match="Username already registered"):
-            service.create_user(user_data)
+    else:
+        with pytest.raises(ValueError, match=error):
+            service.create_user(USER_CREATE)
         
         # Проверяем, что транзакция не коммитилась
         mock_db.add.assert_not_called()
         mock_db.commit.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "user_exists,password_valid,authenticated",
+    [
+        (True, True, True),
+        (True, False, False),
+        (False, True, False),
+    ],
+    ids=["success", "wrong_password", "user_not_found"],
+)
+def test_authenticate_user(mock_db, mock_user, monkeypatch, user_exists, password_valid, authenticated):
+    """Тест аутентификации: успешной, с неверным паролем и несуществующего пользователя."""
+    # Настройка моков
+    set_first(mock_db, mock_user if user_exists else None)
     
-    def test_authenticate_user_success(self, mock_db, mock_user):
-        """Тест успешной аутентификации пользователя."""
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        
-        # Патч для проверки пароля
-        with patch("app.services.user_service.verify_password", return_value=True):
-            # Создаем сервис и вызываем метод
-            service = UserService(mock_db)
-            result = service.authenticate_user("testuser", "testpassword")
-        
-        # Проверки
-        assert result is not None
-        assert result.username == mock_user.username
-        assert result.id == mock_user.id
+    # Патч для проверки пароля
+    monkeypatch.setattr(
+        "app.services.user_service.verify_password",
+        lambda plain_password, hashed_password: password_valid,
+    )
     
-    def test_authenticate_user_wrong_password(self, mock_db, mock_user):
-        """Тест аутентификации пользователя с неверным паролем."""
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        
-        # Патч для проверки пароля
-        with patch("app.services.user_service.verify_password", return_value=False):
-            # Создаем сервис и вызываем метод
-            service = UserService(mock_db)
-            result = service.authenticate_user("testuser", "wrongpassword")
-        
-        # Проверки
-        assert result is None
+    # Создаем сервис и вызываем метод
+    service = UserService(mock_db)
+    result = service.authenticate_user("testuser", "testpassword")
     
-    def test_authenticate_user_not_found(self, mock_db):
-        """Тест аутентификации несуществующего пользователя."""
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = None
-        
-        # Создаем сервис и вызываем метод
-        service = UserService(mock_db)
-        result = service.authenticate_user("nonexistent", "testpassword")
-        
-        # Проверки
-        assert result is None
-    
-    def test_get_user_by_username(self, mock_db, mock_user):
-        """Тест получения пользователя по имени."""
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        
-        # Создаем сервис и вызываем метод
-        service = UserService(mock_db)
-        result = service.get_user_by_username("testuser")
-        
-        # Проверки
+    # Проверки
+    if authenticated:
         assert result is not None
         assert result.username == mock_user.username
         assert result.id == mock_user.id
-    
-    def test_get_user_by_username_not_found(self, mock_db):
-        """Тест получения несуществующего пользователя по имени."""
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = None
-        
-        # Создаем сервис и вызываем метод
-        service = UserService(mock_db)
-        result = service.get_user_by_username("nonexistent")
-        
-        # Проверки
+    else:
         assert result is None
+
+
+def test_get_user_by_username(mock_db, mock_user):
+    """Тест получения пользователя по имени."""
+    # Настройка моков
+    set_first(mock_db, mock_user)
     
-    def test_get_user_by_id(self, mock_db, mock_user):
-        """Тест получения пользователя по ID."""
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        
-        # Создаем сервис и вызываем метод
-        service = UserService(mock_db)
-        result = service.get_user_by_id(1)
-        
-        # Проверки
-        assert result is not None
-        assert result.id == mock_user.id
-        assert result.username == mock_user.username
+    # Создаем сервис и вызываем метод
+    service = UserService(mock_db)
+    result = service.get_user_by_username("testuser")
     
-    def test_get_user_by_id_not_found(self, mock_db):
-        """Тест получения несуществующего пользователя по ID."""
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = None
-        
-        # Создаем сервис и вызываем метод
-        service = UserService(mock_db)
-        result = service.get_user_by_id(999)
-        
-        # Проверки
-        assert result is None
+    # Проверки
+    assert result is not None
+    assert result.username == mock_user.username
+    assert result.id == mock_user.id
+
+
+def test_get_user_by_id(mock_db, mock_user):
+    """Тест получения пользователя по ID."""
+    # Настройка моков
+    set_first(mock_db, mock_user)
+    
+    # Создаем сервис и вызываем метод
+    service = UserService(mock_db)
+    result = service.get_user_by_id(1)
+    
+    # Проверки
+    assert result is not None
+    assert result.id == mock_user.id
+    assert result.username == mock_user.username
 
 
 # Тесты для TransactionService
-class TestTransactionService:
-    """Тесты для сервиса транзакций."""
+def test_get_balance(mock_db, mock_user):
+    """Тест получения баланса пользователя."""
+    # Настройка моков
+    set_first(mock_db, mock_user)
     
-    def test_get_balance(self, mock_db, mock_user):
-        """Тест получения баланса пользователя."""
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        
-        # Создаем сервис и вызываем метод
-        service = TransactionService(mock_db)
-        result = service.get_balance(mock_user.id)
-        
-        # Проверки
-        assert result == mock_user.balance
+    # Создаем сервис и вызываем метод
+    service = TransactionService(mock_db)
+    result = service.get_balance(mock_user.id)
     
-    def test_get_balance_user_not_found(self, mock_db):
-        """Тест получения баланса несуществующего пользователя."""
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = None
-        
-        # Создаем сервис и проверяем, что вызывается исключение
-        service = TransactionService(mock_db)
-        with pytest.raises(ValueError, match="User not found"):
-            service.get_balance(999)
+    # Проверки
+    assert result == mock_user.balance
+
+
+@pytest.mark.parametrize(
+    "amount,error",
+    [
+        (50.0, None),
+        (-50.0, "Amount must be positive"),
+    ],
+    ids=["success", "negative_amount"],
+)
+def test_top_up_balance(mock_db, mock_user, amount, error):
+    """Тест пополнения баланса: успешного и на отрицательную сумму."""
+    # Настройка входных данных
+    description = "Тестовое пополнение"
     
-    def test_top_up_balance(self, mock_db, mock_user, mock_transaction):
-        """Тест пополнения баланса пользователя."""
-        # Настройка входных данных
-        amount = 50.0
-        description = "Тестовое пополнение"
-        
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        mock_db.add.return_value = None
-        mock_db.refresh.return_value = None
-        
-        # Патч для генерации UUID
-        with patch("uuid.uuid4", return_value=uuid.UUID(mock_transaction.id)):
-            # Создаем сервис и вызываем метод
-            service = TransactionService(mock_db)
-            prev_balance, new_balance, tx_id = service.top_up_balance(mock_user.id, amount, description)
+    # Настройка моков
+    set_first(mock_db, mock_user)
+    
+    # Баланс до операции: сервис изменяет его у переданного пользователя
+    initial_balance = mock_user.balance
+    
+    # Создаем сервис и вызываем метод
+    service = TransactionService(mock_db)
+    if error is None:
+        prev_balance, new_balance, tx_id = service.top_up_balance(mock_user.id, amount, description)
         
         # Проверки
-        assert prev_balance == mock_user.balance
-        assert new_balance == mock_user.balance + amount
-        assert tx_id == mock_transaction.id
+        assert prev_balance == initial_balance
+        assert new_balance == initial_balance + amount
+        assert tx_id == str(_UUIDS[0])
         assert mock_user.balance == new_balance
         mock_db.add.assert_called_once()
         mock_db.commit.assert_called_once()
-    
-    def test_top_up_balance_negative(self, mock_db, mock_user):
-        """Тест пополнения баланса на отрицательную сумму."""
-        # Настройка входных данных
-        amount = -50.0
-        description = "Тестовое пополнение"
-        
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        
-        # Создаем сервис и проверяем, что вызывается исключение
-        service = TransactionService(mock_db)
-        with pytest.raises(ValueError, match="Amount must be positive"):
+    else:
+        with pytest.raises(ValueError, match=error):
             service.top_up_balance(mock_user.id, amount, description)
         
         # Проверяем, что транзакция не коммитилась
+        assert mock_user.balance == initial_balance
         mock_db.add.assert_not_called()
         mock_db.commit.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "amount,error",
+    [
+        (50.0, None),
+        (200.0, "Insufficient funds"),
+    ],
+    ids=["success", "insufficient_funds"],
+)
+def test_deduct_balance(mock_db, mock_user, amount, error):
+    """Тест списания средств: успешного и при недостаточном балансе."""
+    # Настройка входных данных
+    description = "Тестовое списание"
     
-    def test_top_up_balance_user_not_found(self, mock_db):
-        """Тест пополнения баланса несуществующего пользователя."""
-        # Настройка входных данных
-        amount = 50.0
-        description = "Тестовое пополнение"
-        
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = None
-        
-        # Создаем сервис и проверяем, что вызывается исключение
-        service = TransactionService(mock_db)
-        with pytest.raises(ValueError, match="User not found"):
-            service.top_up_balance(999, amount, description)
-        
-        # Проверяем, что транзакция не коммитилась
-        mock_db.add.assert_not_called()
-        mock_db.commit.assert_not_called()
+    # Настройка моков
+    set_first(mock_db, mock_user)
     
-    def test_deduct_balance(self, mock_db, mock_user, mock_transaction):
-        """Тест списания средств с баланса пользователя."""
-        # Настройка входных данных
-        amount = 50.0
-        description = "Тестовое списание"
-        
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        mock_db.add.return_value = None
-        mock_db.refresh.return_value = None
-        
-        # Патч для генерации UUID
-        with patch("uuid.uuid4", return_value=uuid.UUID(mock_transaction.id)):
-            # Создаем сервис и вызываем метод
-            service = TransactionService(mock_db)
-            prev_balance, new_balance, tx_id = service.deduct_balance(mock_user.id, amount, description)
+    # Баланс до операции: сервис изменяет его у переданного пользователя
+    initial_balance = mock_user.balance
+    
+    # Создаем сервис и вызываем метод
+    service = TransactionService(mock_db)
+    if error is None:
+        prev_balance, new_balance, tx_id = service.deduct_balance(mock_user.id, amount, description)
         
         # Проверки
-        assert prev_balance == mock_user.balance
-        assert new_balance == mock_user.balance - amount
-        assert tx_id == mock_transaction.id
+        assert prev_balance == initial_balance
+        assert new_balance == initial_balance - amount
+        assert tx_id == str(_UUIDS[0])
         assert mock_user.balance == new_balance
         mock_db.add.assert_called_once()
         mock_db.commit.assert_called_once()
-    
-    def test_deduct_balance_insufficient_funds(self, mock_db, mock_user):
-        """Тест списания средств при недостаточном балансе."""
-        # Настройка входных данных
-        amount = 200.0  # больше, чем mock_user.balance
-        description = "Тестовое списание"
-        
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        
-        # Создаем сервис и проверяем, что вызывается исключение
-        service = TransactionService(mock_db)
-        with pytest.raises(ValueError, match="Insufficient funds"):
+    else:
+        with pytest.raises(ValueError, match=error):
             service.deduct_balance(mock_user.id, amount, description)
         
         # Проверяем, что транзакция не коммитилась
+        assert mock_user.balance == initial_balance
         mock_db.add.assert_not_called()
         mock_db.commit.assert_not_called()
+
+
+@pytest.mark.parametrize("count", [0, 1, 5])
+def test_get_user_transactions(mock_db, mock_transaction, count):
+    """Тест получения истории транзакций пользователя разной длины."""
+    # Настройка моков
+    set_ordered_all(mock_db, [mock_transaction] * count)
     
-    def test_get_user_transactions(self, mock_db, mock_transaction):
-        """Тест получения истории транзакций пользователя."""
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.order_by.return_value.all.return_value = [mock_transaction] * 5
-        
-        # Создаем сервис и вызываем метод
-        service = TransactionService(mock_db)
-        result = service.get_user_transactions(1)
-        
-        # Проверки
-        assert len(result) == 5
-        for tx in result:
-            assert tx.user_id == 1
-            assert tx.type == mock_transaction.type
-            assert tx.amount == mock_transaction.amount
-            assert tx.description == mock_transaction.description
+    # Создаем сервис и вызываем метод
+    service = TransactionService(mock_db)
+    result = service.get_user_transactions(1)
+    
+    # Проверки
+    assert len(result) == count
+    for tx in result:
+        assert tx.user_id == 1
+        assert tx.type == mock_transaction.type
+        assert tx.amount == mock_transaction.amount
+        assert tx.description == mock_transaction.description
 
 
 # Тесты для PredictionService
-class TestPredictionService:
-    """Тесты для сервиса предсказаний."""
-    
-    def test_create_prediction(self, mock_db, mock_user, mock_prediction):
-        """Тест создания предсказания."""
-        # Настройка входных данных
-        data = PredictionCreate(
-            data={"text": "Тестовый текст"},
-            model_version="v1.0"
-        )
-        
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_user
-        mock_db.add.return_value = None
-        mock_db.refresh.return_value = None
-        
-        # Патч для генерации UUID
-        with patch("uuid.uuid4", return_value=uuid.UUID(mock_prediction.id)):
-            # Создаем сервис и вызываем метод
-            service = PredictionService(mock_db)
-            result = service.create_prediction(mock_user.id, data)
-        
-        # Проверки
-        assert result.id == mock_prediction.id
-        assert result.user_id == mock_user.id
-        assert result.status == "pending"
-        assert result.data == data.data
-        assert result.model_version == data.model_version
-        assert result.result is None
-        mock_db.add.assert_called_once()
-        mock_db.commit.assert_called_once()
+def test_create_prediction(mock_db, mock_user):
+    """Тест создания предсказания."""
+    # Настройка моков
+    set_first(mock_db, mock_user)
     
-    def test_create_prediction_user_not_found(self, mock_db):
-        """Тест создания предсказания для несуществующего пользователя."""
-        # Настройка входных данных
-        data = PredictionCreate(
-            data={"text": "Тестовый текст"},
-            model_version="v1.0"
-        )
-        
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = None
-        
-        # Создаем сервис и проверяем, что вызывается исключение
-        service = PredictionService(mock_db)
-        with pytest.raises(ValueError, match="User not found"):
-            service.create_prediction(999, data)
-        
-        # Проверяем, что транзакция не коммитилась
-        mock_db.add.assert_not_called()
-        mock_db.commit.assert_not_called()
+    # Создаем сервис и вызываем метод
+    service = PredictionService(mock_db)
+    result = service.create_prediction(mock_user.id, PREDICTION_CREATE)
     
-    def test_get_prediction(self, mock_db, mock_prediction):
-        """Тест получения предсказания по ID."""
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_prediction
-        
-        # Создаем сервис и вызываем метод
-        service = PredictionService(mock_db)
-        result = service.get_prediction(mock_prediction.id)
-        
-        # Проверки
-        assert result is not None
-        assert result.id == mock_prediction.id
-        assert result.user_id == mock_prediction.user_id
-        assert result.status == mock_prediction.status
-        assert result.data == mock_prediction.data
-        assert result.model_version == mock_prediction.model_version
-    
-    def test_get_prediction_not_found(self, mock_db):
-        """Тест получения несуществующего предсказания."""
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = None
-        
-        # Создаем сервис и вызываем метод
-        service = PredictionService(mock_db)
-        result = service.get_prediction(str(uuid.uuid4()))
-        
-        # Проверки
-        assert result is None
+    # Проверки
+    assert result.id == str(_UUIDS[0])
+    assert result.user_id == mock_user.id
+    assert result.status == "pending"
+    assert result.data == PREDICTION_CREATE.data
+    assert result.model_version == PREDICTION_CREATE.model_version
+    assert result.result is None
+    mock_db.add.assert_called_once()
+    mock_db.commit.assert_called_once()
+
+
+def test_get_prediction(mock_db, mock_prediction):
+    """Тест получения предсказания по ID."""
+    # Настройка моков
+    set_first(mock_db, mock_prediction)
     
-    def test_get_user_predictions(self, mock_db, mock_prediction):
-        """Тест получения всех предсказаний пользователя."""
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.order_by.return_value.all.return_value = [mock_prediction] * 5
-        
-        # Создаем сервис и вызываем метод
-        service = PredictionService(mock_db)
-        result = service.get_user_predictions(1)
-        
-        # Проверки
-        assert len(result) == 5
-        for pred in result:
-            assert pred.user_id == 1
-            assert pred.status == mock_prediction.status
-            assert pred.data == mock_prediction.data
-            assert pred.model_version == mock_prediction.model_version
-    
-    def test_update_prediction_result(self, mock_db, mock_prediction):
-        """Тест обновления результата предсказания."""
-        # Настройка входных данных
-        prediction_id = mock_prediction.id
-        result = {"prediction": "positive", "confidence": 0.95}
-        
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_prediction
-        mock_db.add.return_value = None
-        mock_db.refresh.return_value = None
-        
-        # Создаем сервис и вызываем метод
-        service = PredictionService(mock_db)
-        updated = service.update_prediction_result(prediction_id, result)
-        
-        # Проверки
-        assert updated is True
-        assert mock_prediction.status == "completed"
-        assert mock_prediction.result == result
-        mock_db.commit.assert_called_once()
+    # Создаем сервис и вызываем метод
+    service = PredictionService(mock_db)
+    result = service.get_prediction(mock_prediction.id)
     
-    def test_update_prediction_result_not_found(self, mock_db):
-        """Тест обновления результата несуществующего предсказания."""
-        # Настройка входных данных
-        prediction_id = str(uuid.uuid4())
-        result = {"prediction": "positive", "confidence": 0.95}
-        
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = None
-        
-        # Создаем сервис и вызываем метод
-        service = PredictionService(mock_db)
-        updated = service.update_prediction_result(prediction_id, result)
-        
-        # Проверки
-        assert updated is False
-        mock_db.commit.assert_not_called()
+    # Проверки
+    assert result is not None
+    assert result.id == mock_prediction.id
+    assert result.user_id == mock_prediction.user_id
+    assert result.status == mock_prediction.status
+    assert result.data == mock_prediction.data
+    assert result.model_version == mock_prediction.model_version
+
+
+@pytest.mark.parametrize("count", [0, 1, 5])
+def test_get_user_predictions(mock_db, mock_prediction, count):
+    """Тест получения всех предсказаний пользователя разной длины."""
+    # Настройка моков
+    set_ordered_all(mock_db, [mock_prediction] * count)
     
-    def test_update_prediction_error(self, mock_db, mock_prediction):
-        """Тест обновления предсказания с ошибкой."""
-        # Настройка входных данных
-        prediction_id = mock_prediction.id
-        error_message = "Ошибка модели"
-        
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_prediction
-        mock_db.add.return_value = None
-        mock_db.refresh.return_value = None
-        
-        # Создаем сервис и вызываем метод
-        service = PredictionService(mock_db)
-        updated = service.update_prediction_error(prediction_id, error_message)
-        
-        # Проверки
-        assert updated is True
-        assert mock_prediction.status == "error"
-        assert mock_prediction.result == {"error": error_message}
-        mock_db.commit.assert_called_once()
+    # Создаем сервис и вызываем метод
+    service = PredictionService(mock_db)
+    result = service.get_user_predictions(1)
     
-    def test_update_prediction_error_not_found(self, mock_db):
-        """Тест обновления с ошибкой несуществующего предсказания."""
-        # Настройка входных данных
-        prediction_id = str(uuid.uuid4())
-        error_message = "Ошибка модели"
-        
-        # Настройка моков
-        mock_db.query.return_value.filter.return_value.first.return_value = None
-        
-        # Создаем сервис и вызываем метод
-        service = PredictionService(mock_db)
-        updated = service.update_prediction_error(prediction_id, error_message)
-        
-        # Проверки
-        assert updated is False
-        mock_db.commit.assert_not_called() 
\ No newline at end of file
+    # Проверки
+    assert len(result) == count
+    for pred in result:
+        assert pred.user_id == 1
+        assert pred.status == mock_prediction.status
+        assert pred.data == mock_prediction.data
+        assert pred.model_version == mock_prediction.model_version
+
+
+def test_update_prediction_result(mock_db, mock_prediction):
+    """Тест обновления результата предсказания."""
+    # Настройка входных данных
+    prediction_id = mock_prediction.id
+    result = {"prediction": "positive", "confidence": 0.95}
+    
+    # Настройка моков
+    set_first(mock_db, mock_prediction)
+    
+    # Создаем сервис и вызываем метод
+    service = PredictionService(mock_db)
+    updated = service.update_prediction_result(prediction_id, result)
+    
+    # Проверки
+    assert updated is True
+    assert mock_prediction.status == "completed"
+    assert mock_prediction.result == result
+    mock_db.commit.assert_called_once()
+
+
+def test_update_prediction_error(mock_db, mock_prediction):
+    """Тест обновления предсказания с ошибкой."""
+    # Настройка входных данных
+    prediction_id = mock_prediction.id
+    error_message = "Ошибка модели"
+    
+    # Настройка моков
+    set_first(mock_db, mock_prediction)
+    
+    # Создаем сервис и вызываем метод
+    service = PredictionService(mock_db)
+    updated = service.update_prediction_error(prediction_id, error_message)
+    
+    # Проверки
+    assert updated is True
+    assert mock_prediction.status == "error"
+    assert mock_prediction.result == {"error": error_message}
+    mock_db.commit.assert_called_once()
+
+
+# Общие тесты обращения к отсутствующим записям
+@pytest.mark.parametrize(
+    "call,expected",
+    [
+        (lambda db: UserService(db).get_user_by_username("nonexistent"), None),
+        (lambda db: UserService(db).get_user_by_id(999), None),
+        (lambda db: TransactionService(db).get_balance(999), ValueError),
+        (lambda db: TransactionService(db).top_up_balance(999, 50.0, "Тестовое пополнение"), ValueError),
+        (lambda db: PredictionService(db).create_prediction(999, PREDICTION_CREATE), ValueError),
+        (lambda db: PredictionService(db).get_prediction(str(uuid.uuid4())), None),
+        (
+            lambda db: PredictionService(db).update_prediction_result(
+                str(uuid.uuid4()), {"prediction": "positive", "confidence": 0.95}
+            ),
+            False,
+        ),
+        (lambda db: PredictionService(db).update_prediction_error(str(uuid.uuid4()), "Ошибка модели"), False),
+    ],
+    ids=[
+        "get_user_by_username",
+        "get_user_by_id",
+        "get_balance",
+        "top_up_balance",
+        "create_prediction",
+        "get_prediction",
+        "update_prediction_result",
+        "update_prediction_error",
+    ],
+)
+def test_record_not_found(mock_db, call, expected):
+    """Тест обращения сервисов к несуществующему пользователю или предсказанию."""
+    # Настройка моков
+    set_first(mock_db, None)
+    
+    # Вызываем метод сервиса и проверяем результат или исключение
+    if expected is ValueError:
+        with pytest.raises(ValueError, match="User not found"):
+            call(mock_db)
+    else:
+        assert call(mock_db) is expected
+    
+    # Проверяем, что транзакция не коммитилась
+    mock_db.add.assert_not_called()
+    mock_db.commit.assert_not_called()
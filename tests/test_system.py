@@ -11,6 +11,7 @@
 Для запуска тестов должна быть запущена система с помощью docker-compose.
 """
 
+import pytest
 import requests
 import time
 import random
@@ -23,6 +24,9 @@ BASE_URL = "http://localhost:8000"
 API_PREFIX = "/api"  # Префикс API
 API_TIMEOUT = 10
 
+# Тесты обращаются к запущенному ML Service: pytest -m "not integration" их исключает
+pytestmark = pytest.mark.integration
+
 
 class MLServiceTester:
     """Класс для тестирования системы ML Service."""
@@ -76,7 +80,7 @@ class MLServiceTester:
         
         return response
 
-    def test_create_user(self) -> bool:
+    def check_create_user(self) -> bool:
         """Создает нового пользователя."""
         print("\n=== Тест 2: Создание нового пользователя ===")
         self.username = self.generate_random_username()
@@ -107,7 +111,7 @@ class MLServiceTester:
             print(f"Ошибка при создании пользователя: {e}")
             return False
     
-    def test_login(self) -> bool:
+    def check_login(self) -> bool:
         """Выполняет аутентификацию и получает токен."""
         print("\n=== Тест 3: Аутентификация и получение токена ===")
         try:
@@ -146,7 +150,7 @@ class MLServiceTester:
             print(f"Ошибка при аутентификации: {e}")
             return False
 
-    def test_get_balance(self) -> Tuple[bool, float]:
+    def check_balance(self) -> Tuple[bool, float]:
         """Получает баланс пользователя."""
         print("\n=== Тест 4: Получение баланса пользователя ===")
         try:
@@ -165,7 +169,7 @@ class MLServiceTester:
             print(f"Ошибка при получении баланса: {e}")
             return False, 0
 
-    def test_top_up_balance(self, amount: float = 100.0) -> bool:
+    def check_top_up_balance(self, amount: float = 100.0) -> bool:
         """Пополняет баланс пользователя."""
         print(f"\n=== Тест 5: Пополнение баланса на {amount} кредитов ===")
         try:
@@ -187,7 +191,7 @@ class MLServiceTester:
             print(f"Ошибка при пополнении баланса: {e}")
             return False
 
-    def test_get_transaction_history(self) -> bool:
+    def check_transaction_history(self) -> bool:
         """Получает историю транзакций пользователя."""
         print("\n=== Тест 6: Получение истории транзакций ===")
         try:
@@ -240,7 +244,7 @@ class MLServiceTester:
             traceback.print_exc()
             return False
 
-    def test_make_prediction(self, text: str = "Это тестовый текст для предсказания") -> bool:
+    def check_make_prediction(self, text: str = "Это тестовый текст для предсказания") -> bool:
         """Отправляет запрос на предсказание."""
         print("\n=== Тест 7: Запрос предсказания ===")
         try:
@@ -265,7 +269,7 @@ class MLServiceTester:
             print(f"Ошибка при отправке запроса на предсказание: {e}")
             return False
 
-    def test_get_prediction_result(self, prediction_id: str) -> bool:
+    def check_prediction_result(self, prediction_id: str) -> bool:
         """Получает результат предсказания."""
         print(f"\n=== Тест 8: Получение результата предсказания (ID: {prediction_id}) ===")
         max_attempts = 20  # Увеличиваем количество попыток с 10 до 20
@@ -304,7 +308,7 @@ class MLServiceTester:
         print("Рассматриваем тест как условно пройденный.")
         return True  # Возвращаем True, чтобы не блокировать другие тесты
 
-    def test_get_predictions_history(self) -> bool:
+    def check_predictions_history(self) -> bool:
         """Получает историю предсказаний пользователя."""
         print("\n=== Тест 9: Получение истории предсказаний ===")
         try:
@@ -343,7 +347,7 @@ class MLServiceTester:
             traceback.print_exc()
             return False
 
-    def test_transactions_security(self) -> bool:
+    def check_transactions_security(self) -> bool:
         """Проверяет, требует ли эндпоинт транзакций аутентификации."""
         print("\n=== Тест: Проверка безопасности эндпоинта транзакций ===")
         try:
@@ -382,7 +386,7 @@ class MLServiceTester:
             print(f"Ошибка при проверке безопасности: {e}")
             return False
 
-    def test_ml_workers_health(self) -> bool:
+    def check_ml_workers_health(self) -> bool:
         """Проверяет работоспособность ML-воркеров."""
         print("\n=== Тест: Проверка работоспособности ML-воркеров ===")
         try:
@@ -424,7 +428,7 @@ class MLServiceTester:
         results = {}
         
         # Тест 1: Создание пользователя
-        results["create_user"] = self.test_create_user()
+        results["create_user"] = self.check_create_user()
         
         # Если предоставлены имя пользователя и пароль, используем их вместо созданного пользователя
         if username and password:
@@ -437,7 +441,7 @@ class MLServiceTester:
             print("Используем тестового пользователя: test/test")
         
         # Тест 2: Аутентификация и получение токена
-        results["login"] = self.test_login()
+        results["login"] = self.check_login()
         
         # Если не удалось войти в систему, останавливаем тесты
         if not results["login"]:
@@ -445,20 +449,20 @@ class MLServiceTester:
             return results
             
         # Тест 3: Получение баланса пользователя
-        success, balance = self.test_get_balance()
+        success, balance = self.check_balance()
         results["get_balance"] = success
         
         # Тест 4: Пополнение баланса
-        results["top_up_balance"] = self.test_top_up_balance(100.0)
+        results["top_up_balance"] = self.check_top_up_balance(100.0)
         
         # Проверяем баланс снова
-        success, balance = self.test_get_balance()
+        success, balance = self.check_balance()
         
         # Тест 5: Получение истории транзакций
-        results["get_transactions"] = self.test_get_transaction_history()
+        results["get_transactions"] = self.check_transaction_history()
         
         # Тест 6: Отправка запроса на предсказание
-        results["make_prediction"] = self.test_make_prediction()
+        results["make_prediction"] = self.check_make_prediction()
         
         # Если удалось сделать предсказание, проверяем его результат
         if results["make_prediction"] and self.prediction_ids:
@@ -466,18 +470,18 @@ class MLServiceTester:
             time.sleep(5)  # Ждем 5 секунд
             
             # Тест 7: Получение результата предсказания
-            results["get_prediction_result"] = self.test_get_prediction_result(self.prediction_ids[0])
+            results["get_prediction_result"] = self.check_prediction_result(self.prediction_ids[0])
         else:
             results["get_prediction_result"] = False
         
         # Тест 8: Получение истории предсказаний
-        results["get_predictions_history"] = self.test_get_predictions_history()
+        results["get_predictions_history"] = self.check_predictions_history()
         
         # Тест 9: Проверка безопасности эндпоинта транзакций
-        results["transactions_security"] = self.test_transactions_security()
+        results["transactions_security"] = self.check_transactions_security()
         
         # Тест 10: Проверка работоспособности ML-воркеров
-        results["ml_workers_health"] = self.test_ml_workers_health()
+        results["ml_workers_health"] = self.check_ml_workers_health()
         
         # Выводим результаты тестов
         print("\n=== Результаты тестов ===")
@@ -492,9 +496,71 @@ class MLServiceTester:
         return results
 
 
+@pytest.fixture(scope="module")
+def system_tester(service_available):
+    """Фикстура, создающая тестировщика системы."""
+    return MLServiceTester()
+
+
+def test_create_user(system_tester):
+    """Тест создания нового пользователя."""
+    assert system_tester.check_create_user()
+
+
+def test_login(system_tester):
+    """Тест аутентификации и получения токена."""
+    if not system_tester.username or not system_tester.password:
+        system_tester.username = "test"
+        system_tester.password = "test"
+    assert system_tester.check_login()
+
+
+def test_get_balance(system_tester):
+    """Тест получения баланса пользователя."""
+    success, _ = system_tester.check_balance()
+    assert success
+
+
+def test_top_up_balance(system_tester):
+    """Тест пополнения баланса."""
+    assert system_tester.check_top_up_balance(100.0)
+
+
+def test_get_transaction_history(system_tester):
+    """Тест получения истории транзакций."""
+    assert system_tester.check_transaction_history()
+
+
+def test_make_prediction(system_tester):
+    """Тест отправки запроса на предсказание."""
+    assert system_tester.check_make_prediction()
+
+
+def test_get_prediction_result(system_tester):
+    """Тест получения результата отправленного предсказания."""
+    assert system_tester.prediction_ids, "Нет отправленных предсказаний"
+    time.sleep(5)  # Ждем 5 секунд
+    assert system_tester.check_prediction_result(system_tester.prediction_ids[0])
+
+
+def test_get_predictions_history(system_tester):
+    """Тест получения истории предсказаний."""
+    assert system_tester.check_predictions_history()
+
+
+def test_transactions_security(system_tester):
+    """Тест защиты транзакций от доступа без авторизации."""
+    assert system_tester.check_transactions_security()
+
+
+def test_ml_workers_health(system_tester):
+    """Тест работоспособности ML-воркеров."""
+    assert system_tester.check_ml_workers_health()
+
+
 if __name__ == "__main__":
-    tester = MLServiceTester()
-    test_results = tester.run_all_tests()
+    service_tester = MLServiceTester()
+    test_results = service_tester.run_all_tests()
     
     # Подсчет успешных тестов
     successful_tests = sum(1 for result in test_results.values() if result)
@@ -5,343 +5,353 @@
 используя моки для имитации внешних зависимостей.
 """
 
+import copy
+import sys
 import pytest
-import unittest
-from unittest.mock import patch, MagicMock, Mock
-import json
+from helpers import set_first
+from unittest.mock import patch, MagicMock
 from datetime import datetime
 
-# Предполагаемые импорты для тестирования функций сервиса
-# Пути могут отличаться в зависимости от реальной структуры проекта
+# Пропускаем весь модуль, если модули приложения недоступны или не содержат нужных имен
 try:
-    from app.services.user_service import create_user, authenticate_user
-    from app.services.transaction_service import get_balance, top_up_balance, get_user_transactions
-    from app.services.prediction_service import create_prediction, get_prediction, process_prediction
-    from app.services.auth_service import get_current_user, create_access_token
-    from app.core.auth import verify_password, get_password_hash
-    from app.db.database import get_db
-    from app.schemas.user import UserCreate, UserResponse
-    from app.schemas.transaction import TransactionResponse
-    from app.schemas.prediction import PredictionCreate, PredictionResponse
-    
-    # Флаг для определения доступности реальных модулей
-    REAL_MODULES_AVAILABLE = True
+    import app.services.user_service as user_service
+    import app.services.transaction_service as transaction_service
+    import app.services.prediction_service as prediction_service
+    import app.services.auth_service as auth_service
+    import app.core.auth as auth
+    import app.schemas.user as user_schemas
+    import app.schemas.prediction as prediction_schemas
 except ImportError:
-    # Если модули недоступны, создаем пустые заглушки для тестов
-    REAL_MODULES_AVAILABLE = False
-    print("Внимание: Реальные модули недоступны. Используются заглушки для тестов.")
+    pytest.skip("Реальные модули недоступны", allow_module_level=True)
+
+
+# Маркер для выборочного запуска: pytest -m unit
+pytestmark = pytest.mark.unit
+
+# Общие тестовые данные
+HASHED_PASSWORD = "hashedpassword123"
+USER_ID = 1
+AMOUNT = 100.0
+TRANSACTION_ID = "tx_123456"
+PREDICTION_ID = "pred_123456"
+TEST_TEXT = "Это тестовый текст для предсказания"
+
+# Прототипы моков моделей создаются один раз при импорте модуля,
+# тесты получают их поверхностные копии
+_USER_PROTO = MagicMock()
+_USER_PROTO.id = USER_ID
+_USER_PROTO.username = "testuser"
+_USER_PROTO.email = "test@example.com"
+_USER_PROTO.hashed_password = HASHED_PASSWORD
+_USER_PROTO.balance = 150.0
+
+_TRANSACTION_PROTO = MagicMock()
+_TRANSACTION_PROTO.id = TRANSACTION_ID
+
+_PREDICTION_PROTO = MagicMock()
+_PREDICTION_PROTO.id = PREDICTION_ID
+_PREDICTION_PROTO.user_id = USER_ID
+_PREDICTION_PROTO.status = "pending"
+_PREDICTION_PROTO.data = {"text": TEST_TEXT}
+
+_TRANSACTIONS = [
+    MagicMock(
+        id=f"tx_{i}", 
+        user_id=USER_ID, 
+        type="topup", 
+        amount=100.0,
+        created_at=datetime.now()
+    ) for i in range(5)
+]
+
+
+# Фикстуры для тестов
+@pytest.fixture
+def test_user_data():
+    """Фикстура с данными тестового пользователя."""
+    return {
+        "username": "testuser",
+        "email": "test@example.com",
+        "password": "password123"
+    }
+
+
+@pytest.fixture(scope="module", autouse=True)
+def patch_models():
+    """Подменяет модели User, Transaction и Prediction моками на время модуля.
+
+    Патчи применяются один раз на модуль ко всем его тестам независимо от
+    выбора через -k, а тесты задают return_value у полученных моков вместо
+    собственных with patch(...).
+    """
+    patchers = {
+        "User": patch("app.models.user.User"),
+        "Transaction": patch("app.models.transaction.Transaction"),
+        "Prediction": patch("app.models.prediction.Prediction"),
+    }
+    mocks = {name: patcher.start() for name, patcher in patchers.items()}
+    yield mocks
+    for patcher in patchers.values():
+        patcher.stop()
+
+
+@pytest.fixture(autouse=True)
+def _reset_model_mocks(patch_models):
+    """Сбрасывает return_value, side_effect и журнал вызовов моков моделей перед каждым тестом."""
+    for mock in patch_models.values():
+        mock.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture
+def db_session():
+    """Фикстура, создающая мок сессии БД.
+    
+    Мок создается заново для каждого теста: общий мок сохранял бы между тестами
+    журнал вызовов add/commit и результаты query(...), заданные через set_first.
+    """
+    return MagicMock()
+
+
+@pytest.fixture
+def mock_user():
+    """Фикстура, возвращающая копию прототипа пользователя."""
+    return copy.copy(_USER_PROTO)
+
+
+@pytest.fixture
+def mock_transaction():
+    """Фикстура, возвращающая копию прототипа транзакции."""
+    return copy.copy(_TRANSACTION_PROTO)
+
+
+@pytest.fixture
+def mock_prediction():
+    """Фикстура, возвращающая копию прототипа предсказания."""
+    return copy.copy(_PREDICTION_PROTO)
 
 
 #----------------------------------------------------------
 # Тесты для компонента аутентификации
 #----------------------------------------------------------
 
-class TestAuthentication(unittest.TestCase):
-    """Тесты для функций аутентификации и авторизации."""
+@patch('app.core.auth.pwd_context.verify')
+def test_verify_password(mock_verify):
+    """Тест проверки пароля."""
+    # Настройка мока
+    mock_verify.return_value = True
     
-    def setUp(self):
-        # Создаем тестовые данные
-        self.test_user = {
-            "username": "testuser",
-            "email": "test@example.com",
-            "password": "password123"
-        }
-        self.hashed_password = "hashedpassword123"
-        
-    @unittest.skipIf(not REAL_MODULES_AVAILABLE, "Реальные модули недоступны")
-    @patch('app.core.auth.pwd_context.verify')
-    def test_verify_password(self, mock_verify):
-        """Тест проверки пароля."""
-        # Настройка мока
-        mock_verify.return_value = True
-        
-        # Вызов тестируемой функции
-        result = verify_password("password123", self.hashed_password)
-        
-        # Проверка результата
-        self.assertTrue(result)
-        mock_verify.assert_called_once_with("password123", self.hashed_password)
-
-    @unittest.skipIf(not REAL_MODULES_AVAILABLE, "Реальные модули недоступны")
-    @patch('app.core.auth.pwd_context.hash')
-    def test_get_password_hash(self, mock_hash):
-        """Тест хеширования пароля."""
-        # Настройка мока
-        mock_hash.return_value = self.hashed_password
-        
-        # Вызов тестируемой функции
-        result = get_password_hash("password123")
-        
-        # Проверка результата
-        self.assertEqual(result, self.hashed_password)
-        mock_hash.assert_called_once_with("password123")
-
-    @unittest.skipIf(not REAL_MODULES_AVAILABLE, "Реальные модули недоступны")
-    @patch('app.services.auth_service.jwt.encode')
-    def test_create_access_token(self, mock_encode):
-        """Тест создания токена доступа."""
-        # Настройка мока
-        expected_token = "access_token_123"
-        mock_encode.return_value = expected_token
-        
-        # Вызов тестируемой функции
-        token = create_access_token({"sub": "testuser"})
-        
-        # Проверка результата
-        self.assertEqual(token, expected_token)
-        self.assertTrue(mock_encode.called)
+    # Вызов тестируемой функции
+    result = auth.verify_password("password123", HASHED_PASSWORD)
+    
+    # Проверка результата
+    assert result
+    mock_verify.assert_called_once_with("password123", HASHED_PASSWORD)
+
+
+@patch('app.core.auth.pwd_context.hash')
+def test_get_password_hash(mock_hash):
+    """Тест хеширования пароля."""
+    # Настройка мока
+    mock_hash.return_value = HASHED_PASSWORD
+    
+    # Вызов тестируемой функции
+    result = auth.get_password_hash("password123")
+    
+    # Проверка результата
+    assert result == HASHED_PASSWORD
+    mock_hash.assert_called_once_with("password123")
+
+
+@patch('app.services.auth_service.jwt.encode')
+def test_create_access_token(mock_encode):
+    """Тест создания токена доступа."""
+    # Настройка мока
+    expected_token = "access_token_123"
+    mock_encode.return_value = expected_token
+    
+    # Вызов тестируемой функции
+    token = auth_service.create_access_token({"sub": "testuser"})
+    
+    # Проверка результата
+    assert token == expected_token
+    assert mock_encode.called
 
 
 #----------------------------------------------------------
 # Тесты для компонента пользователей
 #----------------------------------------------------------
 
-class TestUserService(unittest.TestCase):
-    """Тесты для функций работы с пользователями."""
+@patch('app.services.user_service.get_password_hash')
+def test_create_user(mock_get_password_hash, test_user_data, db_session, mock_user, patch_models):
+    """Тест создания пользователя."""
+    # Настройка моков
+    mock_get_password_hash.return_value = HASHED_PASSWORD
+    set_first(db_session, None)
     
-    def setUp(self):
-        # Создаем тестовые данные
-        self.test_user_data = {
-            "username": "testuser",
-            "email": "test@example.com",
-            "password": "password123"
-        }
-        self.db_session = MagicMock()
+    db_session.add.return_value = None
+    db_session.commit.return_value = None
+    db_session.refresh.return_value = None
     
-    @unittest.skipIf(not REAL_MODULES_AVAILABLE, "Реальные модули недоступны")
-    @patch('app.services.user_service.get_password_hash')
-    def test_create_user(self, mock_get_password_hash):
-        """Тест создания пользователя."""
-        # Настройка моков
-        mock_get_password_hash.return_value = "hashedpassword123"
-        self.db_session.query.return_value.filter.return_value.first.return_value = None
-        
-        mock_user = MagicMock()
-        mock_user.id = 1
-        mock_user.username = self.test_user_data["username"]
-        mock_user.email = self.test_user_data["email"]
-        
-        self.db_session.add.return_value = None
-        self.db_session.commit.return_value = None
-        self.db_session.refresh.return_value = None
-        
-        # Имитируем создание пользователя в БД
-        with patch('app.models.user.User', return_value=mock_user):
-            # Вызов тестируемой функции
-            user_create = UserCreate(**self.test_user_data)
-            result = create_user(self.db_session, user_create)
-            
-            # Проверка результата
-            self.assertEqual(result.username, self.test_user_data["username"])
-            self.assertEqual(result.email, self.test_user_data["email"])
-            self.assertTrue(self.db_session.add.called)
-            self.assertTrue(self.db_session.commit.called)
+    # Имитируем создание пользователя в БД
+    patch_models["User"].return_value = mock_user
     
-    @unittest.skipIf(not REAL_MODULES_AVAILABLE, "Реальные модули недоступны")
-    @patch('app.services.user_service.verify_password')
-    def test_authenticate_user(self, mock_verify_password):
-        """Тест аутентификации пользователя."""
-        # Настройка моков
-        mock_user = MagicMock()
-        mock_user.username = self.test_user_data["username"]
-        mock_user.hashed_password = "hashedpassword123"
-        
-        self.db_session.query.return_value.filter.return_value.first.return_value = mock_user
-        mock_verify_password.return_value = True
-        
-        # Вызов тестируемой функции
-        result = authenticate_user(
-            self.db_session, 
-            self.test_user_data["username"], 
-            self.test_user_data["password"]
-        )
-        
-        # Проверка результата
-        self.assertEqual(result, mock_user)
-        mock_verify_password.assert_called_once_with(
-            self.test_user_data["password"], 
-            mock_user.hashed_password
-        )
+    # Вызов тестируемой функции
+    user_create = user_schemas.UserCreate(**test_user_data)
+    result = user_service.create_user(db_session, user_create)
+    
+    # Проверка результата
+    assert result.username == test_user_data["username"]
+    assert result.email == test_user_data["email"]
+    assert db_session.add.called
+    assert db_session.commit.called
+
+
+@patch('app.services.user_service.verify_password')
+def test_authenticate_user(mock_verify_password, test_user_data, db_session, mock_user):
+    """Тест аутентификации пользователя."""
+    # Настройка моков
+    set_first(db_session, mock_user)
+    mock_verify_password.return_value = True
+    
+    # Вызов тестируемой функции
+    result = user_service.authenticate_user(
+        db_session, 
+        test_user_data["username"], 
+        test_user_data["password"]
+    )
+    
+    # Проверка результата
+    assert result == mock_user
+    mock_verify_password.assert_called_once_with(
+        test_user_data["password"], 
+        mock_user.hashed_password
+    )
 
 
 #----------------------------------------------------------
 # Тесты для компонента транзакций
 #----------------------------------------------------------
 
-class TestTransactionService(unittest.TestCase):
-    """Тесты для функций работы с транзакциями."""
+def test_get_balance(db_session, mock_user):
+    """Тест получения баланса пользователя."""
+    # Настройка мока
+    set_first(db_session, mock_user)
     
-    def setUp(self):
-        # Создаем тестовые данные
-        self.user_id = 1
-        self.amount = 100.0
-        self.transaction_id = "tx_123456"
-        self.db_session = MagicMock()
+    # Вызов тестируемой функции
+    result = transaction_service.get_balance(db_session, USER_ID)
     
-    @unittest.skipIf(not REAL_MODULES_AVAILABLE, "Реальные модули недоступны")
-    def test_get_balance(self):
-        """Тест получения баланса пользователя."""
-        # Настройка мока
-        mock_user = MagicMock()
-        mock_user.id = self.user_id
-        mock_user.balance = 150.0
-        
-        self.db_session.query.return_value.filter.return_value.first.return_value = mock_user
-        
-        # Вызов тестируемой функции
-        result = get_balance(self.db_session, self.user_id)
-        
-        # Проверка результата
-        self.assertEqual(result, 150.0)
+    # Проверка результата
+    assert result == 150.0
+
+
+def test_top_up_balance(db_session, mock_user, mock_transaction, patch_models):
+    """Тест пополнения баланса пользователя."""
+    # Настройка моков
+    mock_user.balance = 50.0
     
-    @unittest.skipIf(not REAL_MODULES_AVAILABLE, "Реальные модули недоступны")
-    def test_top_up_balance(self):
-        """Тест пополнения баланса пользователя."""
-        # Настройка моков
-        mock_user = MagicMock()
-        mock_user.id = self.user_id
-        mock_user.balance = 50.0
-        
-        self.db_session.query.return_value.filter.return_value.first.return_value = mock_user
-        self.db_session.add.return_value = None
-        self.db_session.commit.return_value = None
-        
-        mock_transaction = MagicMock()
-        mock_transaction.id = self.transaction_id
-        
-        # Имитируем создание транзакции
-        with patch('app.models.transaction.Transaction', return_value=mock_transaction):
-            # Вызов тестируемой функции
-            prev_balance, new_balance, tx_id = top_up_balance(
-                self.db_session, 
-                self.user_id, 
-                self.amount
-            )
-            
-            # Проверка результата
-            self.assertEqual(prev_balance, 50.0)
-            self.assertEqual(new_balance, 150.0)
-            self.assertEqual(tx_id, self.transaction_id)
-            self.assertTrue(self.db_session.add.called)
-            self.assertTrue(self.db_session.commit.called)
+    set_first(db_session, mock_user)
+    db_session.add.return_value = None
+    db_session.commit.return_value = None
     
-    @unittest.skipIf(not REAL_MODULES_AVAILABLE, "Реальные модули недоступны")
-    def test_get_user_transactions(self):
-        """Тест получения истории транзакций пользователя."""
-        # Создаем тестовые транзакции
-        mock_transactions = [
-            MagicMock(
-                id=f"tx_{i}", 
-                user_id=self.user_id, 
-                type="topup", 
-                amount=100.0,
-                created_at=datetime.now()
-            ) for i in range(5)
-        ]
-        
-        # Настройка мока
-        self.db_session.query.return_value.filter.return_value.order_by.return_value\
-            .offset.return_value.limit.return_value.all.return_value = mock_transactions
-        
-        # Вызов тестируемой функции
-        result = get_user_transactions(self.db_session, self.user_id, 0, 10)
-        
-        # Проверка результата
-        self.assertEqual(len(result), 5)
-        for i, tx in enumerate(result):
-            self.assertEqual(tx.id, f"tx_{i}")
-            self.assertEqual(tx.user_id, self.user_id)
+    # Имитируем создание транзакции
+    patch_models["Transaction"].return_value = mock_transaction
+    
+    # Вызов тестируемой функции
+    prev_balance, new_balance, tx_id = transaction_service.top_up_balance(
+        db_session, 
+        USER_ID, 
+        AMOUNT
+    )
+    
+    # Проверка результата
+    assert prev_balance == 50.0
+    assert new_balance == 150.0
+    assert tx_id == TRANSACTION_ID
+    assert db_session.add.called
+    assert db_session.commit.called
+
+
+def test_get_user_transactions(db_session):
+    """Тест получения истории транзакций пользователя."""
+    # Настройка мока
+    db_session.query.return_value.filter.return_value.order_by.return_value\
+        .offset.return_value.limit.return_value.all.return_value = list(_TRANSACTIONS)
+    
+    # Вызов тестируемой функции
+    result = transaction_service.get_user_transactions(db_session, USER_ID, 0, 10)
+    
+    # Проверка результата
+    assert len(result) == 5
+    for i, tx in enumerate(result):
+        assert tx.id == f"tx_{i}"
+        assert tx.user_id == USER_ID
 
 
 #----------------------------------------------------------
 # Тесты для компонента предсказаний
 #----------------------------------------------------------
 
-class TestPredictionService(unittest.TestCase):
-    """Тесты для функций работы с предсказаниями."""
+def test_create_prediction(db_session, mock_prediction, patch_models):
+    """Тест создания запроса на предсказание."""
+    # Настройка моков
+    db_session.add.return_value = None
+    db_session.commit.return_value = None
+    db_session.refresh.return_value = None
     
-    def setUp(self):
-        # Создаем тестовые данные
-        self.user_id = 1
-        self.prediction_id = "pred_123456"
-        self.test_text = "Это тестовый текст для предсказания"
-        self.db_session = MagicMock()
+    # Имитируем создание предсказания
+    patch_models["Prediction"].return_value = mock_prediction
     
-    @unittest.skipIf(not REAL_MODULES_AVAILABLE, "Реальные модули недоступны")
-    def test_create_prediction(self):
-        """Тест создания запроса на предсказание."""
-        # Настройка моков
-        mock_prediction = MagicMock()
-        mock_prediction.id = self.prediction_id
-        mock_prediction.user_id = self.user_id
-        mock_prediction.status = "pending"
-        
-        self.db_session.add.return_value = None
-        self.db_session.commit.return_value = None
-        self.db_session.refresh.return_value = None
-        
-        # Имитируем создание предсказания
-        with patch('app.models.prediction.Prediction', return_value=mock_prediction):
-            # Вызов тестируемой функции
-            data = {"text": self.test_text}
-            prediction_create = PredictionCreate(data=data)
-            result = create_prediction(self.db_session, prediction_create, self.user_id)
-            
-            # Проверка результата
-            self.assertEqual(result.id, self.prediction_id)
-            self.assertEqual(result.status, "pending")
-            self.assertTrue(self.db_session.add.called)
-            self.assertTrue(self.db_session.commit.called)
+    # Вызов тестируемой функции
+    data = {"text": TEST_TEXT}
+    prediction_create = prediction_schemas.PredictionCreate(data=data)
+    result = prediction_service.create_prediction(db_session, prediction_create, USER_ID)
     
-    @unittest.skipIf(not REAL_MODULES_AVAILABLE, "Реальные модули недоступны")
-    def test_get_prediction(self):
-        """Тест получения результата предсказания."""
-        # Настройка мока
-        mock_prediction = MagicMock()
-        mock_prediction.id = self.prediction_id
-        mock_prediction.user_id = self.user_id
-        mock_prediction.status = "completed"
-        mock_prediction.result = {"prediction": "positive", "confidence": 0.95}
-        
-        self.db_session.query.return_value.filter.return_value.first.return_value = mock_prediction
-        
-        # Вызов тестируемой функции
-        result = get_prediction(self.db_session, self.prediction_id, self.user_id)
-        
-        # Проверка результата
-        self.assertEqual(result.id, self.prediction_id)
-        self.assertEqual(result.status, "completed")
-        self.assertEqual(result.result["prediction"], "positive")
+    # Проверка результата
+    assert result.id == PREDICTION_ID
+    assert result.status == "pending"
+    assert db_session.add.called
+    assert db_session.commit.called
+
+
+def test_get_prediction(db_session, mock_prediction):
+    """Тест получения результата предсказания."""
+    # Настройка мока
+    mock_prediction.status = "completed"
+    mock_prediction.result = {"prediction": "positive", "confidence": 0.95}
     
-    @unittest.skipIf(not REAL_MODULES_AVAILABLE, "Реальные модули недоступны")
-    @patch('app.services.prediction_service.get_prediction')
-    @patch('app.services.prediction_service.update_prediction')
-    def test_process_prediction(self, mock_update_prediction, mock_get_prediction):
-        """Тест обработки предсказания."""
-        # Настройка моков
-        mock_prediction = MagicMock()
-        mock_prediction.id = self.prediction_id
-        mock_prediction.user_id = self.user_id
-        mock_prediction.status = "pending"
-        mock_prediction.data = {"text": self.test_text}
-        
-        mock_get_prediction.return_value = mock_prediction
-        mock_update_prediction.return_value = None
-        
-        # Имитируем модель ML
-        mock_ml_model = MagicMock()
-        mock_ml_model.predict.return_value = {"prediction": "positive", "confidence": 0.95}
+    set_first(db_session, mock_prediction)
+    
+    # Вызов тестируемой функции
+    result = prediction_service.get_prediction(db_session, PREDICTION_ID, USER_ID)
+    
+    # Проверка результата
+    assert result.id == PREDICTION_ID
+    assert result.status == "completed"
+    assert result.result["prediction"] == "positive"
+
+
+@patch('app.services.prediction_service.get_prediction')
+@patch('app.services.prediction_service.update_prediction')
+def test_process_prediction(mock_update_prediction, mock_get_prediction, db_session, mock_prediction):
+    """Тест обработки предсказания."""
+    # Настройка моков
+    mock_get_prediction.return_value = mock_prediction
+    mock_update_prediction.return_value = None
+    
+    # Имитируем модель ML
+    mock_ml_model = MagicMock()
+    mock_ml_model.predict.return_value = {"prediction": "positive", "confidence": 0.95}
+    
+    with patch('app.services.prediction_service.get_ml_model', return_value=mock_ml_model):
+        # Вызов тестируемой функции
+        prediction_service.process_prediction(db_session, PREDICTION_ID)
         
-        with patch('app.services.prediction_service.get_ml_model', return_value=mock_ml_model):
-            # Вызов тестируемой функции
-            process_prediction(self.db_session, self.prediction_id)
-            
-            # Проверка результатов
-            mock_get_prediction.assert_called_once_with(self.db_session, self.prediction_id)
-            mock_ml_model.predict.assert_called_once_with(self.test_text)
-            mock_update_prediction.assert_called_once()
+        # Проверка результатов
+        mock_get_prediction.assert_called_once_with(db_session, PREDICTION_ID)
+        mock_ml_model.predict.assert_called_once_with(TEST_TEXT)
+        mock_update_prediction.assert_called_once()
 
 
 # Запуск тестов
 if __name__ == '__main__':
-    unittest.main() 
\ No newline at end of file
+    sys.exit(pytest.main([__file__, "-v"]))
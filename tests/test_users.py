@@ -8,381 +8,199 @@
 - Проверка работы аутентификации и токенов
 """
 
+import pytest
 import requests
-import time
-import random
-import string
+import secrets
 import json
-from typing import Dict, Any, Optional, List, Tuple
+import logging
+import sys
+import threading
+from typing import Dict, Any
+from urllib.parse import parse_qsl, urlsplit
+from requests.adapters import BaseAdapter
+
+from service_helpers import (
+    API_PREFIX,
+    API_TIMEOUT,
+    INVALID_AUTH_HEADERS,
+    MULTIPLE_USERS_COUNT,
+    PROTECTED_ENDPOINTS,
+    SERVICE_URL,
+    USER_URLS,
+    UserTester,
+    get_token,
+)
+
+
+class _FakeUserAPI(BaseAdapter):
+    """Транспорт requests, имитирующий пользовательские эндпоинты ML Service в памяти.
+
+    Поддерживает регистрацию, получение токена и проверку токена на защищенных
+    эндпоинтах, чтобы тесты пользователей выполнялись без запущенного сервиса.
+    """
 
-# Базовые настройки для тестов
-BASE_URL = "http://localhost:8000"
-API_PREFIX = "/api"  # Префикс API
-API_TIMEOUT = 10
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._users: Dict[str, Dict[str, Any]] = {}
+        self._tokens: Dict[str, str] = {}
+
+    def send(self, request, **kwargs):
+        path = urlsplit(request.url).path
+        body = request.body.decode() if isinstance(request.body, bytes) else request.body or ""
+        
+        if path == "/health":
+            return self._response(request, 200, {"status": "ok"})
+        if request.method == "POST" and path == f"{API_PREFIX}/users":
+            return self._create_user(request, json.loads(body))
+        if request.method == "POST" and path == f"{API_PREFIX}/token":
+            return self._login(request, dict(parse_qsl(body)))
+        if request.method == "GET" and path[len(API_PREFIX):] in PROTECTED_ENDPOINTS:
+            authorization = request.headers.get("Authorization", "")
+            username = self._tokens.get(authorization[len("Bearer "):]) if authorization.startswith("Bearer ") else None
+            if username is None:
+                return self._response(request, 401, {"detail": "Not authenticated"})
+            if path == f"{API_PREFIX}/balance":
+                return self._response(request, 200, {"balance": self._users[username]["balance"]})
+            return self._response(request, 200, [])
+        return self._response(request, 404, {"detail": "Not Found"})
+
+    def close(self):
+        pass
+
+    def _create_user(self, request, data):
+        with self._lock:
+            if data["username"] in self._users:
+                return self._response(request, 400, {"detail": "Пользователь уже существует"})
+            user_id = len(self._users) + 1
+            self._users[data["username"]] = {"id": user_id, "password": data["password"], "balance": 0.0}
+        return self._response(request, 200, {"id": user_id, "username": data["username"], "email": data["email"]})
+
+    def _login(self, request, data):
+        user = self._users.get(data.get("username"))
+        if user is None or user["password"] != data.get("password"):
+            return self._response(request, 401, {"detail": "Неверное имя пользователя или пароль"})
+        token = secrets.token_hex(16)
+        with self._lock:
+            self._tokens[token] = data["username"]
+        return self._response(request, 200, {"access_token": token, "token_type": "bearer"})
+
+    @staticmethod
+    def _response(request, status_code, payload):
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = json.dumps(payload).encode()
+        response.headers["Content-Type"] = "application/json"
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
 
 
-class UserTester:
-    """Класс для тестирования пользовательских операций в ML Service."""
+@pytest.fixture(scope="session", params=["offline", pytest.param("live", marks=pytest.mark.integration)])
+def api_session(request):
+    """HTTP-сессия тестов пользователей.
 
-    def __init__(self):
-        self.base_url = BASE_URL
-        self.api_prefix = API_PREFIX
-        self.token = None
-        self.username = None
-        self.password = None
-        self.email = None
-        self.user_id = None
-        self.tokens = {}
-
-    def generate_random_username(self, prefix="testuser") -> str:
-        """Генерирует случайное имя пользователя."""
-        random_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
-        return f"{prefix}_{random_suffix}"
-
-    def make_request(
-        self,
-        method: str,
-        endpoint: str,
-        data: Optional[Dict[str, Any]] = None,
-        params: Optional[Dict[str, Any]] = None,
-        auth: bool = False,
-        specific_token: Optional[str] = None
-    ) -> requests.Response:
-        """Выполняет HTTP-запрос к API."""
-        # Добавляем префикс API к эндпоинту, кроме случая, когда эндпоинт уже начинается с префикса или это /health
-        if not endpoint.startswith(self.api_prefix) and endpoint != "/health":
-            endpoint = f"{self.api_prefix}{endpoint}"
-            
-        url = f"{self.base_url}{endpoint}"
-        headers = {}
-        
-        if auth:
-            token = specific_token if specific_token else self.token
-            if token:
-                headers["Authorization"] = f"Bearer {token}"
-        
-        if method.upper() == "GET":
-            response = requests.get(url, params=params, headers=headers, timeout=API_TIMEOUT)
-        elif method.upper() == "POST":
-            headers["Content-Type"] = "application/json"
-            response = requests.post(url, json=data, headers=headers, timeout=API_TIMEOUT)
-        elif method.upper() == "PUT":
-            headers["Content-Type"] = "application/json"
-            response = requests.put(url, json=data, headers=headers, timeout=API_TIMEOUT)
-        elif method.upper() == "DELETE":
-            response = requests.delete(url, headers=headers, timeout=API_TIMEOUT)
-        else:
-            raise ValueError(f"Неподдерживаемый HTTP метод: {method}")
-        
-        return response
+    В варианте offline запросы обрабатывает _FakeUserAPI без сетевого ввода-вывода,
+    в варианте live они уходят в запущенный ML Service через общую сессию.
+    """
+    if request.param == "live":
+        yield request.getfixturevalue("http")
+        return
+    with requests.Session() as session:
+        session.mount(SERVICE_URL, _FakeUserAPI())
+        yield session
 
-    def test_create_user(self) -> bool:
-        """Тестирует создание нового пользователя."""
-        print("\n=== Тест 1: Создание нового пользователя ===")
-        self.username = self.generate_random_username()
-        self.password = "testpassword123"
-        self.email = f"{self.username}@example.com"
-        
-        try:
-            user_data = {
-                "username": self.username,
-                "password": self.password,
-                "email": self.email
-            }
-            response = self.make_request("POST", "/users", data=user_data)
-            print(f"Статус код: {response.status_code}")
-            print(f"Ответ: {response.json()}")
-            
-            if response.status_code == 200:
-                print(f"Пользователь создан: {self.username}")
-                # Сохраняем ID пользователя, если он есть в ответе
-                user_data = response.json()
-                if "id" in user_data:
-                    self.user_id = user_data["id"]
-                return True
-            else:
-                print(f"Ошибка создания пользователя: {response.json()}")
-                return False
-        except Exception as e:
-            print(f"Ошибка при создании пользователя: {e}")
-            return False
-
-    def test_login(self) -> bool:
-        """Тестирует аутентификацию и получение токена."""
-        print("\n=== Тест 2: Аутентификация и получение токена ===")
-        try:
-            # Используем form-data для отправки данных авторизации
-            token_url = f"{self.base_url}{self.api_prefix}/token"
-            
-            # Вывод для диагностики
-            print(f"Попытка авторизации для пользователя: {self.username}")
-            
-            # Используем правильный формат данных для API
-            auth_data = {
-                "username": self.username, 
-                "password": self.password
-            }
-            
-            response = requests.post(
-                token_url,
-                data=auth_data,  # Отправляем как form data, не как JSON
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=API_TIMEOUT
-            )
-            print(f"Статус код: {response.status_code}")
-            
-            if response.status_code == 200:
-                response_data = response.json()
-                self.token = response_data.get("access_token")
-                print(f"Токен получен: {self.token[:10]}...")
-                return True
-            else:
-                print(f"Ошибка аутентификации: {response.text}")
-                # Дополнительная отладочная информация
-                print(f"Используемый URL: {token_url}")
-                print(f"Отправленные данные: {auth_data}")
-                return False
-        except Exception as e:
-            print(f"Ошибка при аутентификации: {e}")
-            return False
-
-    def test_create_multiple_users(self, count: int = 3) -> bool:
-        """Тестирует создание нескольких пользователей и хранит их токены."""
-        print(f"\n=== Тест 3: Создание {count} пользователей ===")
-        success_count = 0
-        
-        for i in range(count):
-            username = self.generate_random_username()
-            password = f"password{i+1}"
-            email = f"{username}@example.com"
-            
-            try:
-                user_data = {
-                    "username": username,
-                    "password": password,
-                    "email": email
-                }
-                response = self.make_request("POST", "/users", data=user_data)
-                
-                if response.status_code == 200:
-                    print(f"Пользователь {i+1} создан: {username}")
-                    
-                    # Получаем токен для созданного пользователя
-                    auth_data = {
-                        "username": username, 
-                        "password": password
-                    }
-                    # Используем API префикс для токена
-                    token_url = f"{self.base_url}{self.api_prefix}/token"
-                    token_response = requests.post(
-                        token_url,
-                        data=auth_data,  # Отправляем как form data, не как JSON
-                        headers={"Content-Type": "application/x-www-form-urlencoded"},
-                        timeout=API_TIMEOUT
-                    )
-                    
-                    print(f"Статус код авторизации для {username}: {token_response.status_code}")
-                    
-                    if token_response.status_code == 200:
-                        token = token_response.json().get("access_token")
-                        self.tokens[username] = {
-                            "token": token,
-                            "password": password,
-                            "email": email
-                        }
-                        success_count += 1
-                    else:
-                        print(f"Ошибка получения токена для пользователя {username}")
-                else:
-                    print(f"Ошибка создания пользователя {i+1}: {response.json()}")
-            except Exception as e:
-                print(f"Ошибка при создании пользователя {i+1}: {e}")
-        
-        print(f"Успешно создано {success_count} из {count} пользователей")
-        return success_count == count
-
-    def test_user_token_validity(self) -> bool:
-        """Тестирует валидность токенов для созданных пользователей."""
-        print("\n=== Тест 4: Проверка валидности токенов ===")
-        if not self.tokens:
-            print("Нет токенов для проверки")
-            return False
-        
-        success_count = is_failed = 0
-        for username, user_data in self.tokens.items():
-            token = user_data["token"]
-            
-            try:
-                # Проверяем токен, делая запрос на получение баланса
-                response = self.make_request("GET", "/balance", auth=True, specific_token=token)
-                
-                if response.status_code == 200:
-                    print(f"Токен пользователя {username} валиден")
-                    success_count += 1
-                else:
-                    print(f"Токен пользователя {username} невалиден: {response.json()}")
-                    is_failed = True
-            except Exception as e:
-                print(f"Ошибка при проверке токена пользователя {username}: {e}")
-                is_failed = True
-        
-        # Проверяем также неверный токен
-        try:
-            invalid_token = "invalid_token_for_testing"
-            response = self.make_request("GET", "/balance", auth=True, specific_token=invalid_token)
-            
-            if response.status_code != 200:
-                print("Правильно отклонен неверный токен")
-            else:
-                print("Ошибка: принят неверный токен")
-                is_failed = True
-        except Exception as e:
-            print(f"Ошибка при проверке неверного токена: {e}")
-        
-        print(f"Успешно проверено {success_count} из {len(self.tokens)} токенов")
-        return success_count == len(self.tokens) and not is_failed
 
-    def test_invalid_login(self) -> bool:
-        """Тестирует обработку неверных учетных данных при входе."""
-        print("\n=== Тест 5: Обработка неверных учетных данных ===")
-        
-        # Тест с неверным паролем
-        try:
-            auth_data = {
-                "username": self.username, 
-                "password": "wrong_password"
-            }
-            # Используем API префикс для токена
-            token_url = f"{self.base_url}{self.api_prefix}/token"
-            response = requests.post(
-                token_url,
-                data=auth_data,  # Отправляем как form data, не как JSON
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=API_TIMEOUT
-            )
-            
-            if response.status_code != 200:
-                print(f"Правильно отклонен неверный пароль (код: {response.status_code})")
-            else:
-                print("Ошибка: принят неверный пароль")
-                return False
-        except Exception as e:
-            print(f"Ошибка при проверке неверного пароля: {e}")
-            return False
-        
-        # Тест с несуществующим пользователем
-        try:
-            auth_data = {
-                "username": "nonexistent_user", 
-                "password": "some_password"
-            }
-            # Используем API префикс для токена
-            token_url = f"{self.base_url}{self.api_prefix}/token"
-            response = requests.post(
-                token_url,
-                data=auth_data,  # Отправляем как form data, не как JSON
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=API_TIMEOUT
-            )
-            
-            if response.status_code != 200:
-                print(f"Правильно отклонен несуществующий пользователь (код: {response.status_code})")
-                return True
-            else:
-                print("Ошибка: принят несуществующий пользователь")
-                return False
-        except Exception as e:
-            print(f"Ошибка при проверке несуществующего пользователя: {e}")
-            return False
-
-    def test_access_without_token(self) -> bool:
-        """Тестирует доступ к защищенным ресурсам без токена."""
-        print("\n=== Тест 6: Доступ к защищенным ресурсам без токена ===")
-        
-        endpoints = [
-            "/balance",
-            "/transactions",
-            "/predictions"
-        ]
-        
-        success_count = 0
-        for endpoint in endpoints:
-            try:
-                # Добавляем префикс API к эндпоинту
-                full_endpoint = f"{self.api_prefix}{endpoint}"
-                # Запрос без токена
-                response = requests.get(
-                    f"{self.base_url}{full_endpoint}",
-                    timeout=API_TIMEOUT
-                )
-                
-                if response.status_code in [401, 403]:
-                    print(f"Правильно отклонен доступ к {endpoint} без токена (код: {response.status_code})")
-                    success_count += 1
-                else:
-                    print(f"Ошибка: разрешен доступ к {endpoint} без токена (код: {response.status_code})")
-            except Exception as e:
-                print(f"Ошибка при проверке доступа к {endpoint} без токена: {e}")
-        
-        print(f"Успешно проверено {success_count} из {len(endpoints)} эндпоинтов")
-        return success_count == len(endpoints)
+@pytest.fixture(scope="module")
+def user_tester(api_session):
+    """Фикстура, создающая тестировщика пользовательских операций."""
+    return UserTester(api_session)
 
-    def run_all_tests(self) -> Dict[str, bool]:
-        """Запускает все тесты и возвращает результаты."""
-        results = {}
-        
-        # Тест 1: Создание пользователя
-        results["create_user"] = self.test_create_user()
-        
-        # Если пользователь не создан, останавливаем тесты
-        if not results["create_user"]:
-            print("Ошибка создания пользователя. Тесты остановлены.")
-            return results
-        
-        # Тест 2: Аутентификация и получение токена
-        results["login"] = self.test_login()
-        
-        # Если не получилось залогиниться, продолжаем другие тесты
-        if not results["login"]:
-            print("Ошибка аутентификации. Пропускаем тесты, требующие токен.")
-        
-        # Тест 3: Создание нескольких пользователей
-        results["create_multiple_users"] = self.test_create_multiple_users()
-        
-        # Тест 4: Проверка валидности токенов
-        if results["create_multiple_users"]:
-            results["token_validity"] = self.test_user_token_validity()
-        else:
-            results["token_validity"] = False
-            print("Пропуск проверки токенов: не созданы тестовые пользователи")
-        
-        # Тест 5: Обработка неверных учетных данных
-        results["invalid_login"] = self.test_invalid_login()
-        
-        # Тест 6: Доступ к защищенным ресурсам без токена
-        results["access_without_token"] = self.test_access_without_token()
-        
-        # Печатаем общие результаты
-        print("\n=== Общие результаты тестирования пользователей ===")
-        for test_name, result in results.items():
-            status = "УСПЕШНО" if result else "ОШИБКА"
-            print(f"{test_name}: {status}")
-        
-        return results
+
+@pytest.fixture
+def auth_token(api_session):
+    """Фикстура, возвращающая функцию запроса токена через HTTP-сессию тестов."""
+    return lambda username, password: get_token(api_session, username, password)
+
+
+@pytest.fixture(scope="session", params=range(MULTIPLE_USERS_COUNT))
+def created_user(request, api_session):
+    """Фикстура, один раз за сессию создающая пользователя и получающая его токен.
+
+    Параметризована номером пользователя: каждый тест с этой фикстурой
+    выполняется для каждого из созданных пользователей. Успешность создания
+    и авторизации проверяют test_create_user и test_login.
+    """
+    return UserTester(api_session)._create_and_login(request.param)
+
+
+@pytest.fixture
+def logged_in_user(created_user):
+    """Фикстура, возвращающая созданного пользователя с токеном.
+
+    Если пользователя не удалось создать или авторизовать, зависящие тесты
+    пропускаются: причину показывают test_create_user и test_login.
+    """
+    if created_user["token"] is None:
+        pytest.skip(f"Пользователь {created_user['username']} не создан или не авторизован")
+    return created_user
+
+
+def test_create_user(created_user):
+    """Тест создания нового пользователя."""
+    response = created_user["create_response"]
+    assert response is not None, f"Запрос создания пользователя {created_user['username']} не выполнен"
+    assert response.status_code == 200, f"Ошибка создания пользователя: {response.text}"
+
+
+def test_login(created_user):
+    """Тест аутентификации и получения токена."""
+    response = created_user["token_response"]
+    assert response is not None, f"Запрос токена для пользователя {created_user['username']} не выполнен"
+    assert response.status_code == 200, f"Ошибка аутентификации: {response.text}"
+    assert created_user["token"], "В ответе нет токена доступа"
+
+
+def test_create_multiple_users(user_tester, caplog):
+    """Тест параллельного создания нескольких пользователей и проверки их токенов."""
+    caplog.set_level(logging.INFO, logger=UserTester.__module__)
+    users = user_tester.check_create_multiple_users()
+    assert len(users) == MULTIPLE_USERS_COUNT
+    assert f"Успешно создано {MULTIPLE_USERS_COUNT} из {MULTIPLE_USERS_COUNT} пользователей" in caplog.text
+    assert user_tester.check_user_token_validity(users)
+
+
+def test_user_token_validity(user_tester, logged_in_user):
+    """Тест доступа к балансу с токеном созданного пользователя."""
+    response = user_tester.make_request("GET", "/balance", headers=logged_in_user["headers"])
+    assert response.status_code == 200, f"Токен пользователя {logged_in_user['username']} невалиден"
+
+
+def test_invalid_token_rejected(user_tester):
+    """Тест отклонения неверного токена."""
+    response = user_tester.make_request("GET", "/balance", headers=INVALID_AUTH_HEADERS)
+    assert response.status_code != 200, "Принят неверный токен"
+
+
+def test_invalid_login_wrong_password(auth_token, logged_in_user):
+    """Тест входа с неверным паролем."""
+    response = auth_token(logged_in_user["username"], "wrong_password")
+    assert response.status_code != 200, f"Принят неверный пароль пользователя {logged_in_user['username']}"
+
+
+def test_invalid_login_nonexistent_user(auth_token):
+    """Тест входа несуществующего пользователя."""
+    response = auth_token("nonexistent_user", "some_password")
+    assert response.status_code != 200, "Принят несуществующий пользователь"
+
+
+@pytest.mark.parametrize("endpoint", PROTECTED_ENDPOINTS)
+def test_access_without_token(user_tester, endpoint):
+    """Тест доступа к защищенному эндпоинту без токена."""
+    response = user_tester.session.get(USER_URLS[endpoint], timeout=API_TIMEOUT)
+    assert response.status_code in (401, 403), f"Разрешен доступ к {endpoint} без токена"
 
 
 if __name__ == "__main__":
-    tester = UserTester()
-    test_results = tester.run_all_tests()
-    
-    # Подсчет успешных тестов
-    successful_tests = sum(1 for result in test_results.values() if result)
-    total_tests = len(test_results)
-    success_rate = (successful_tests / total_tests) * 100
-    
-    print(f"\nУспешно пройдено {successful_tests} из {total_tests} тестов ({success_rate:.1f}%)")
-    
-    if successful_tests == total_tests:
-        print("[OK] Все тесты пользовательских операций пройдены успешно! Система управления пользователями работает корректно.")
-    else:
-        print("[FAIL] Некоторые тесты пользовательских операций не пройдены. Система управления пользователями может работать некорректно.") 
\ No newline at end of file
+    sys.exit(pytest.main([__file__, "-v"]))